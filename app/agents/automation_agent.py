@@ -1,15 +1,10 @@
 # app/agents/automation_agent.py
 
-from langchain_groq import ChatGroq
-from dotenv import load_dotenv
-import os
+from app.agents.structured_output import IncrementalJSONObject, validate_bug_report
+from app.llm.provider import get_llm
+from app.tracing import span
 
-load_dotenv()
-
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    api_key=os.getenv("GROQ_API_KEY")
-)
+llm = get_llm()
 
 def generate_email(context, user_request):
     """
@@ -30,16 +25,12 @@ USER REQUEST:
 Write a clear, concise, and professional email:
 """
 
-    response = llm.invoke(prompt)
+    with span("automation", workflow="email"):
+        response = llm.invoke(prompt)
     return response.content
 
 
-def generate_bug_report(context, user_request):
-    """
-    Generates a structured bug/incident report (Jira-style).
-    """
-
-    prompt = f"""
+BUG_REPORT_PROMPT = """
 You are an enterprise incident management assistant.
 
 Using the context below, generate a structured bug report in JSON format.
@@ -58,10 +49,124 @@ Return ONLY valid JSON with the following fields:
 - priority
 """
 
-    response = llm.invoke(prompt)
+BUG_REPORT_REPAIR_PROMPT = """
+The JSON bug report below is invalid.
+
+PROBLEMS:
+{errors}
+
+BROKEN OUTPUT:
+{output}
+
+Return ONLY the corrected JSON object with these fields:
+- title (string)
+- description (string)
+- impact (string)
+- steps_to_reproduce (list of strings)
+- priority (string)
+Keep the original content; fix only the structure.
+"""
+
+# Appended to the original prompt when the first answer had no JSON at all
+BUG_REPORT_STRICT_SUFFIX = """
+Your previous answer was not JSON. Respond with the JSON object only:
+no explanation and no markdown. The first character must be "{".
+"""
+
+# Broken outputs longer than this are cut before being sent for repair
+REPAIR_MAX_CHARS = 6000
+
+
+def _stream_json(prompt):
+    """Stream a completion into an IncrementalJSONObject, stopping once the object closes."""
+    parser = IncrementalJSONObject()
+    stream = llm.stream(prompt)
+    try:
+        for delta in stream:
+            if parser.feed(delta):
+                break
+    finally:
+        stream.close()
+    return parser
+
+
+def _check(parser):
+    data, error = parser.parse()
+    return validate_bug_report(data) if error is None else (None, [error])
+
+
+def generate_bug_report(context, user_request):
+    """
+    Generates a structured bug/incident report (Jira-style).
+    """
+
+    prompt = BUG_REPORT_PROMPT.format(context=context, user_request=user_request)
+
+    with span("automation", workflow="bug_report"):
+        response = llm.invoke(prompt)
     return response.content
 
 
+def generate_bug_report_structured(context, user_request, max_repairs: int = 1):
+    """
+    Bug report as a validated dict.
+
+    The answer is streamed and parsed as it arrives; the stream stops as
+    soon as the JSON object closes. Each of up to max_repairs fixes is
+    one of:
+    - JSON that fails the schema gets a small repair call that only sees
+      the broken JSON and the problems, not the whole retrieval context;
+    - an answer with no JSON at all is regenerated from the original
+      prompt (with the context) plus a stricter instruction, since a
+      repair call would have nothing to keep.
+
+    Returns {"report": dict | None, "raw": str, "repaired": bool,
+    "regenerated": bool, "errors": [str]}.
+    """
+    prompt = BUG_REPORT_PROMPT.format(context=context, user_request=user_request)
+
+    with span("automation", workflow="bug_report", structured=True) as s:
+        parser = _stream_json(prompt)
+        report, errors = _check(parser)
+        raw = parser.object_text or parser.text
+        s["not_json"] = parser.not_json
+
+        repairs = 0
+        repaired = regenerated = False
+        while report is None and repairs < max_repairs:
+            repairs += 1
+
+            if parser.not_json:
+                print("🔁 [BUG REPORT] Answer was not JSON, regenerating")
+                parser = _stream_json(prompt + BUG_REPORT_STRICT_SUFFIX)
+                raw = parser.object_text or parser.text
+                regenerated = True
+            else:
+                print(f"🔧 [BUG REPORT] Repairing output: {'; '.join(errors)}")
+                repair_prompt = BUG_REPORT_REPAIR_PROMPT.format(
+                    errors="\n".join(f"- {e}" for e in errors),
+                    output=raw[:REPAIR_MAX_CHARS],
+                )
+                raw = llm.invoke(repair_prompt).content
+                parser = IncrementalJSONObject()
+                parser.feed(raw)
+                repaired = True
+
+            report, errors = _check(parser)
+
+        s["repairs"] = repairs
+        s["regenerated"] = regenerated
+        s["valid"] = report is not None
+
+    return {
+        "report": report,
+        "raw": raw,
+        "repaired": repaired,
+        "regenerated": regenerated,
+        "errors": errors,
+    }
+
+
 def generate_summary(context, user_request):
     """
     Generates an executive-style summary or report.
@@ -81,5 +186,6 @@ USER REQUEST:
 Summary:
 """
 
-    response = llm.invoke(prompt)
+    with span("automation", workflow="summary"):
+        response = llm.invoke(prompt)
     return response.content
@@ -0,0 +1,112 @@
+# app/agents/batch_automation.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app.agents.automation_agent import (
+    generate_email,
+    generate_summary,
+    generate_bug_report_structured
+)
+from app.agents.rag_agent import get_raw_context
+from app.config import LLM_MAX_CONCURRENCY
+from app.tracing import span
+
+# -------------------------------------------------
+# Workflows
+# -------------------------------------------------
+def _bug_report(context, user_request):
+    """Validated report dict, or the raw text if it could not be repaired."""
+    result = generate_bug_report_structured(context, user_request)
+    return result["report"] or result["raw"]
+
+
+WORKFLOWS = {
+    "email": generate_email,
+    "summary": generate_summary,
+    "bug_report": _bug_report,
+}
+
+# Same default instructions the UI buttons use
+DEFAULT_REQUESTS = {
+    "email": "Draft a professional email.",
+    "summary": "Provide a concise summary.",
+    "bug_report": "Format as valid JSON.",
+}
+
+
+def _normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+# -------------------------------------------------
+# Bulk Automation
+# -------------------------------------------------
+def run_batch(jobs, max_workers: int = LLM_MAX_CONCURRENCY, retrieval_workers: int = 2):
+    """
+    Run many (query, workflow) jobs and yield results as they complete.
+
+    jobs: iterable of dicts with "query", "workflow" and optional "id"
+    and "request" (instruction text; defaults to DEFAULT_REQUESTS).
+
+    Retrieval runs once per distinct query and is shared by every job
+    asking that query. LLM calls run concurrently; the provider's
+    concurrency cap and rate limit still apply on top of max_workers.
+
+    Each result is a dict with id, query, workflow, output, error and
+    seconds. A failed job yields an error instead of stopping the batch.
+    Closing the generator early cancels jobs that have not started.
+    """
+    jobs = [dict(job, id=job.get("id", idx)) for idx, job in enumerate(jobs)]
+
+    for job in jobs:
+        if job.get("workflow") not in WORKFLOWS:
+            raise ValueError(
+                f"Job {job['id']}: unknown workflow {job.get('workflow')!r} "
+                f"(expected one of {', '.join(WORKFLOWS)})"
+            )
+
+    print(f"📦 [BATCH] {len(jobs)} jobs, "
+          f"{len({_normalize_query(j['query']) for j in jobs})} distinct queries")
+
+    # Separate pools: LLM workers block on retrieval futures, so sharing
+    # one pool could starve retrieval of threads
+    retrieval_pool = ThreadPoolExecutor(max_workers=retrieval_workers)
+    llm_pool = ThreadPoolExecutor(max_workers=max_workers)
+    finished = False
+
+    try:
+        contexts = {}
+        for job in jobs:
+            key = _normalize_query(job["query"])
+            if key not in contexts:
+                contexts[key] = retrieval_pool.submit(get_raw_context, job["query"])
+
+        def run_job(job):
+            start = time.perf_counter()
+            result = {
+                "id": job["id"],
+                "query": job["query"],
+                "workflow": job["workflow"],
+                "output": None,
+                "error": None,
+            }
+            try:
+                with span("batch_job", workflow=job["workflow"]):
+                    context = contexts[_normalize_query(job["query"])].result()
+                    request = job.get("request") or DEFAULT_REQUESTS[job["workflow"]]
+                    result["output"] = WORKFLOWS[job["workflow"]](context, request)
+            except Exception as e:
+                result["error"] = str(e)
+            result["seconds"] = round(time.perf_counter() - start, 3)
+            return result
+
+        futures = [llm_pool.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+        finished = True
+    finally:
+        # A consumer that stops early (break, Ctrl-C) closes the generator;
+        # drop queued jobs instead of running their LLM calls first
+        for pool in (llm_pool, retrieval_pool):
+            pool.shutdown(wait=finished, cancel_futures=not finished)
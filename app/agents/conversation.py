@@ -0,0 +1,206 @@
+# app/agents/conversation.py
+
+import math
+import re
+
+from app.config import (
+    HISTORY_TOKEN_BUDGET,
+    HISTORY_KEEP_TURNS,
+    CONTEXT_REUSE_SIMILARITY,
+)
+from app.llm.provider import get_llm
+from app.retrievers.text_retriever import embed_query, retrieve_text, text_doc_count
+from app.tracing import span
+
+llm = get_llm()
+
+# -------------------------------------------------
+# Conversation Store
+#
+# A conversation is a plain dict so it can live in st.session_state:
+#   turns          recent turns [{"query", "standalone_query", "answer"}]
+#   summary        running summary of turns that were compacted away
+#   last_retrieval chunks (with vectors) retrieved for the last turn
+# -------------------------------------------------
+
+# Answers are stored truncated; the history only needs their gist
+ANSWER_MAX_CHARS = 600
+
+FOLLOW_UP_WORDS = {
+    "it", "its", "they", "them", "their", "that", "this", "those", "these",
+    "he", "she", "his", "her", "there", "above", "previous", "same",
+}
+FOLLOW_UP_OPENERS = ("and ", "also ", "what about", "how about", "why", "then ", "so ")
+
+REWRITE_PROMPT = """
+Rewrite the follow-up question as a standalone question that can be
+understood without the conversation. Keep it short. Return ONLY the
+rewritten question.
+
+CONVERSATION:
+{history}
+
+FOLLOW-UP QUESTION:
+{query}
+
+STANDALONE QUESTION:
+"""
+
+SUMMARY_PROMPT = """
+Summarize this conversation between a user and a document assistant in
+at most 5 short bullet points. Keep names, numbers and document titles.
+
+{history}
+
+SUMMARY:
+"""
+
+
+def new_conversation():
+    return {"turns": [], "summary": "", "last_retrieval": None}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text
+    return len(text) // 4
+
+
+def format_history(conversation) -> str:
+    lines = []
+    if conversation["summary"]:
+        lines.append(f"Summary of earlier turns:\n{conversation['summary']}")
+    for turn in conversation["turns"]:
+        lines.append(f"User: {turn['query']}\nAssistant: {turn['answer']}")
+    return "\n\n".join(lines)
+
+
+# -------------------------------------------------
+# Follow-up Rewriting
+# -------------------------------------------------
+def is_follow_up(conversation, query: str) -> bool:
+    """
+    Cheap heuristic: only questions that look like they lean on earlier
+    turns pay for a rewrite call.
+    """
+    if not conversation["turns"]:
+        return False
+
+    text = query.strip().lower()
+    words = set(re.findall(r"[a-z']+", text))
+    return (
+        len(words) <= 4
+        or text.startswith(FOLLOW_UP_OPENERS)
+        or bool(words & FOLLOW_UP_WORDS)
+    )
+
+
+def rewrite_query(conversation, query: str) -> str:
+    """
+    Standalone version of a follow-up question (unchanged otherwise).
+    """
+    with span("query_rewrite") as s:
+        if not is_follow_up(conversation, query):
+            s["rewritten"] = False
+            return query
+
+        prompt = REWRITE_PROMPT.format(history=format_history(conversation), query=query)
+        rewritten = llm.invoke(prompt).content.strip().strip('"')
+        s["rewritten"] = bool(rewritten)
+        return rewritten or query
+
+
+# -------------------------------------------------
+# Retrieval Reuse
+# -------------------------------------------------
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def retrieve_for_turn(conversation, query: str, k: int = 8):
+    """
+    Retrieve chunks for this turn, reusing the previous turn's chunks
+    when the new question is close enough to the previous one.
+
+    Reused chunks are re-ranked against the new question. The cache is
+    dropped when text_docs changed since (new ingestion, cleared DB),
+    and empty results are never cached. Returns the same shape as
+    retrieve_text().
+    """
+    query_embedding = embed_query(query)
+    index_count = text_doc_count()
+    last = conversation["last_retrieval"]
+
+    if last and last["index_count"] != index_count:
+        last = conversation["last_retrieval"] = None
+
+    with span("retrieval_cache") as s:
+        similarity = _cosine(query_embedding, last["query_embedding"]) if last else 0.0
+        s["cache_hit"] = similarity >= CONTEXT_REUSE_SIMILARITY
+
+        if s["cache_hit"]:
+            ranked = sorted(
+                zip(last["documents"], last["metadatas"], last["embeddings"]),
+                key=lambda item: _cosine(query_embedding, item[2]),
+                reverse=True
+            )[:k]
+            print(f"♻️ [CONVERSATION] Reusing {len(ranked)} chunks (similarity {similarity:.2f})")
+            return {
+                "documents": [[doc for doc, _, _ in ranked]],
+                "metadatas": [[meta for _, meta, _ in ranked]],
+            }
+
+    results = retrieve_text(query, k=k, query_embedding=query_embedding, include_embeddings=True)
+
+    embeddings = results.get("embeddings")
+    if not results["documents"][0] or embeddings is None or not len(embeddings[0]):
+        # Nothing to reuse; a later turn may find chunks ingested meanwhile
+        conversation["last_retrieval"] = None
+        return results
+
+    conversation["last_retrieval"] = {
+        "query_embedding": query_embedding,
+        "index_count": index_count,
+        "documents": results["documents"][0],
+        "metadatas": results["metadatas"][0],
+        "embeddings": [[float(x) for x in emb] for emb in embeddings[0]],
+    }
+    return results
+
+
+# -------------------------------------------------
+# Turn History
+# -------------------------------------------------
+def add_turn(conversation, query: str, standalone_query: str, answer: str):
+    conversation["turns"].append({
+        "query": query,
+        "standalone_query": standalone_query,
+        "answer": answer[:ANSWER_MAX_CHARS],
+    })
+    compact_history(conversation)
+
+
+def compact_history(conversation, budget: int = HISTORY_TOKEN_BUDGET,
+                    keep_turns: int = HISTORY_KEEP_TURNS):
+    """
+    Fold older turns into the running summary once the history exceeds
+    its token budget, keeping the most recent turns verbatim.
+
+    Waits until 2 * keep_turns turns have piled up so the summary call
+    is amortized over several turns instead of running on every turn.
+    """
+    if estimate_tokens(format_history(conversation)) <= budget:
+        return
+    if len(conversation["turns"]) < 2 * keep_turns:
+        return
+
+    old_turns = conversation["turns"][:-keep_turns]
+    to_summarize = format_history({"summary": conversation["summary"], "turns": old_turns})
+
+    with span("history_summarize", turns=len(old_turns)):
+        summary = llm.invoke(SUMMARY_PROMPT.format(history=to_summarize)).content.strip()
+
+    conversation["summary"] = summary
+    conversation["turns"] = conversation["turns"][-keep_turns:]
+    print(f"🗜️ [CONVERSATION] Summarized {len(old_turns)} older turns")
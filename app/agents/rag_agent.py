@@ -1,93 +1,137 @@
 # app/agents/rag_agent.py
 
 from app.retrievers.text_retriever import retrieve_text
-from langchain_groq import ChatGroq
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    api_key=os.getenv("GROQ_API_KEY")
+from app.retrievers.image_retriever import retrieve_image_regions
+from app.agents.conversation import (
+    rewrite_query,
+    retrieve_for_turn,
+    format_history,
+    add_turn
 )
+from app.llm.provider import get_llm
+from app.tracing import span
+
+llm = get_llm()
 
 # -------------------------------------------------
 # Multimodal RAG (TEXT + IMAGE OCR via TEXT)
 # -------------------------------------------------
-def multimodal_rag(query):
+def multimodal_rag(query, conversation=None):
     """
     Unified RAG using:
     - PDF text
     - Image OCR text (stored in text_docs)
+    - Best-matching image regions (CLIP) with their OCR text
+
+    With a conversation (see app.agents.conversation), follow-ups are
+    rewritten into standalone queries, still-relevant chunks from the
+    previous turn are reused, and the (compacted) history is added to
+    the prompt. The turn is recorded in the conversation afterwards.
     """
+    with span("rag_query") as s:
+        result = _multimodal_rag(query, conversation)
+        s["chunks"] = len(result["text"]) + len(result["image_regions"])
+        return result
 
-    print("\n[DEBUG] Running multimodal RAG...")
 
+def _multimodal_rag(query, conversation=None):
     # ---------------------
     # 1. Retrieve TEXT (PDF + Image OCR)
     # ---------------------
-    results = retrieve_text(query, k=8)
+    if conversation is not None:
+        standalone_query = rewrite_query(conversation, query)
+        history = format_history(conversation)
+        results = retrieve_for_turn(conversation, standalone_query, k=8)
+    else:
+        standalone_query = query
+        history = ""
+        results = retrieve_text(query, k=8)
 
     documents = results.get("documents", [[]])[0]
     metadatas = results.get("metadatas", [[]])[0]
 
-    if not documents:
+    # ---------------------
+    # 1b. Retrieve IMAGE REGIONS (CLIP)
+    # ---------------------
+    regions = retrieve_image_regions(standalone_query, k=3)
+
+    if not documents and not regions:
+        answer = "No relevant information found in uploaded documents or images."
+        if conversation is not None:
+            add_turn(conversation, query, standalone_query, answer)
         return {
-            "answer": "No relevant information found in uploaded documents or images.",
+            "answer": answer,
             "text": [],
-            "images": []
+            "images": [],
+            "image_regions": [],
+            "standalone_query": standalone_query
         }
 
-    context_blocks = []
-    image_evidence = []
-
-    for doc, meta in zip(documents, metadatas):
-        source_type = meta.get("type", "pdf")
-        source_name = meta.get("source", "unknown")
-
-        if source_type == "image_ocr":
-            context_blocks.append(
-                f"[IMAGE OCR TEXT | {source_name}]\n{doc}"
-            )
-            image_evidence.append(source_name)
-        else:
-            context_blocks.append(
-                f"[PDF TEXT | {source_name}]\n{doc}"
-            )
-
-    context = "\n\n".join(context_blocks)
+    with span("context_build", chunks=len(documents) + len(regions)) as s:
+        context_blocks = []
+        image_evidence = []
+
+        for doc, meta in zip(documents, metadatas):
+            source_type = meta.get("type", "pdf")
+            source_name = meta.get("source", "unknown")
+
+            if source_type == "image_ocr":
+                context_blocks.append(
+                    f"[IMAGE OCR TEXT | {source_name}]\n{doc}"
+                )
+                image_evidence.append(source_name)
+            else:
+                context_blocks.append(
+                    f"[PDF TEXT | {source_name}]\n{doc}"
+                )
+
+        for region in regions:
+            image_evidence.append(region["source"])
+            if region["ocr_text"]:
+                x0, y0, x1, y1 = region["box"]
+                context_blocks.append(
+                    f"[IMAGE REGION | {region['source']} @ ({x0},{y0})-({x1},{y1})]\n{region['ocr_text']}"
+                )
+
+        context = "\n\n".join(context_blocks)
+        s["bytes"] = len(context)
 
     # ---------------------
     # 2. Build prompt
     # ---------------------
+    history_block = f"""
+CONVERSATION SO FAR (for resolving references only, not as evidence):
+{history}
+""" if history else ""
+
     prompt = f"""
 You are a multimodal RAG assistant.
 
 Answer the question ONLY using the evidence below.
 If the answer is not present, say "Not found in the provided documents."
-
+{history_block}
 ====================
 EVIDENCE:
 {context}
 ====================
 
 QUESTION:
-{query}
+{standalone_query}
 
 ANSWER:
 """
 
-    print("[DEBUG] Sending context to LLM...")
-
     response = llm.invoke(prompt)
 
-    print("[DEBUG] Answer generated.")
+    if conversation is not None:
+        add_turn(conversation, query, standalone_query, response.content)
 
     return {
         "answer": response.content,
         "text": documents,
-        "images": list(set(image_evidence))
+        "images": list(set(image_evidence)),
+        "image_regions": regions,
+        "standalone_query": standalone_query
     }
 
 
@@ -100,11 +144,15 @@ def get_raw_context(query):
     documents = results.get("documents", [[]])[0]
     metadatas = results.get("metadatas", [[]])[0]
 
-    blocks = []
+    with span("context_build", chunks=len(documents)) as s:
+        blocks = []
+
+        for doc, meta in zip(documents, metadatas):
+            source_type = meta.get("type", "pdf")
+            source = meta.get("source", "unknown")
+            blocks.append(f"[{source_type.upper()} | {source}]\n{doc}")
 
-    for doc, meta in zip(documents, metadatas):
-        source_type = meta.get("type", "pdf")
-        source = meta.get("source", "unknown")
-        blocks.append(f"[{source_type.upper()} | {source}]\n{doc}")
+        context = "\n\n".join(blocks)
+        s["bytes"] = len(context)
 
-    return "\n\n".join(blocks)
+    return context
@@ -1,15 +1,9 @@
 # app/agents/router_agent.py
 
-from langchain_groq import ChatGroq
-import os
-from dotenv import load_dotenv
+from app.llm.provider import get_llm
+from app.tracing import span
 
-load_dotenv()
-
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    api_key=os.getenv("GROQ_API_KEY")
-)
+llm = get_llm()
 
 ROUTER_PROMPT = """
 You are a query classifier for a multimodal RAG system.
@@ -26,6 +20,8 @@ Query: {query}
 """
 
 def route_query(query):
-    prompt = ROUTER_PROMPT.format(query=query)
-    result = llm.invoke(prompt)
-    return result.content.strip()
+    with span("route") as s:
+        prompt = ROUTER_PROMPT.format(query=query)
+        result = llm.invoke(prompt)
+        s["route"] = result.content.strip()
+        return s["route"]
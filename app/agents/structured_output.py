@@ -0,0 +1,143 @@
+# app/agents/structured_output.py
+
+import json
+
+# -------------------------------------------------
+# Bug Report Schema
+# -------------------------------------------------
+BUG_REPORT_FIELDS = ("title", "description", "impact", "steps_to_reproduce", "priority")
+
+# Streams are cut off after MAX_OUTPUT_CHARS
+MAX_OUTPUT_CHARS = 8000
+
+
+def validate_bug_report(data):
+    """
+    Check a parsed bug report against the schema.
+    Returns (normalized_report, errors); the report is None if invalid.
+    """
+    if not isinstance(data, dict):
+        return None, ["top-level value must be a JSON object"]
+
+    errors = []
+    report = {}
+
+    for field in BUG_REPORT_FIELDS:
+        value = data.get(field)
+        if value is None or value == "" or value == []:
+            errors.append(f"missing field '{field}'")
+            continue
+
+        if field == "steps_to_reproduce":
+            # Accept a single string, normalize to a list of steps
+            if isinstance(value, str):
+                value = [line.strip() for line in value.splitlines() if line.strip()]
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                errors.append("'steps_to_reproduce' must be a list of strings")
+                continue
+        elif not isinstance(value, str):
+            errors.append(f"'{field}' must be a string")
+            continue
+
+        report[field] = value
+
+    if errors:
+        return None, errors
+    return report, []
+
+
+# -------------------------------------------------
+# Incremental JSON Object Parser
+# -------------------------------------------------
+class IncrementalJSONObject:
+    """
+    Consumes streamed text and tracks the first top-level JSON object.
+
+    Markdown fences and any preamble before the first "{" are skipped.
+    The parser reports as soon as the object closes, so the stream can
+    stop there instead of paying for trailing chatter. Output with no
+    object at all is flagged (.not_json) once the stream has ended.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.start = None      # index of the opening "{"
+        self.end = None        # index just past the closing "}"
+        self.error = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def not_json(self):
+        """No "{" seen: the output is prose (meaningful once fed in full)."""
+        return self.start is None and not self.error
+
+    @property
+    def complete(self):
+        return self.end is not None
+
+    @property
+    def object_text(self):
+        if self.start is None:
+            return ""
+        return self.text[self.start:self.end]
+
+    def feed(self, delta):
+        """
+        Add streamed text. Returns True once reading more is pointless:
+        the object is complete or the output hit MAX_OUTPUT_CHARS.
+        """
+        if self.complete or self.error:
+            return True
+
+        self.text += delta
+
+        if len(self.text) > MAX_OUTPUT_CHARS:
+            self.error = f"output exceeded {MAX_OUTPUT_CHARS} characters"
+            return True
+
+        while self._pos < len(self.text):
+            ch = self.text[self._pos]
+            self._pos += 1
+
+            if self.start is None:
+                if ch == "{":
+                    self.start = self._pos - 1
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = self._pos
+                    return True
+
+        return False
+
+    def parse(self):
+        """
+        Parse the collected object. Returns (data, error).
+        """
+        if self.error:
+            return None, self.error
+        if self.not_json:
+            return None, "output is not a JSON object"
+        if not self.complete:
+            return None, "output ended before the JSON object was closed"
+        try:
+            return json.loads(self.object_text), None
+        except json.JSONDecodeError as e:
+            return None, f"invalid JSON: {e}"
@@ -1,6 +1,8 @@
 # app/config.py
 
 import os
+import re
+import sys
 
 # ---------------------------
 # Project root directory
@@ -17,10 +19,103 @@ UPLOAD_DIR = os.path.join(PROJECT_ROOT, "temp_uploads")
 # ---------------------------
 # ChromaDB directory
 # ---------------------------
-CHROMA_PATH = os.path.join(PROJECT_ROOT, "chroma_db")
+CHROMA_PATH = os.getenv("CHROMA_PATH", os.path.join(PROJECT_ROOT, "chroma_db"))
+
+# ---------------------------
+# Ingestion job queue (SQLite)
+# ---------------------------
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(PROJECT_ROOT, "ingest_jobs.db"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+# Running jobs refresh a heartbeat every JOB_HEARTBEAT_SECONDS; a job whose
+# owner process is gone, or whose heartbeat is older than JOB_STALE_SECONDS,
+# is put back in the queue
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+
+# ---------------------------
+# Memory-bounded ingestion
+# ---------------------------
+# Peak RSS (MB) the ingestion pipeline throttles at; 0 disables the guard
+MAX_RSS_MB = float(os.getenv("MAX_RSS_MB", "0"))
+MEMORY_THROTTLE_TIMEOUT = float(os.getenv("MEMORY_THROTTLE_TIMEOUT", "120"))
+# Images with a side longer than this (px) are OCR'd in tiles of this size
+OCR_TILE_SIZE = int(os.getenv("OCR_TILE_SIZE", "2048"))
+# Allow very large diagram scans (PIL's default guard is ~89M pixels)
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", "200000000"))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# ---------------------------
+# Multi-vector image indexing
+# ---------------------------
+# Images are split into regions of about this size (px), each CLIP-encoded
+CLIP_REGION_SIZE = int(os.getenv("CLIP_REGION_SIZE", "768"))
+CLIP_MAX_REGIONS = int(os.getenv("CLIP_MAX_REGIONS", "48"))
+CLIP_BATCH_SIZE = int(os.getenv("CLIP_BATCH_SIZE", "16"))
+# Per-image wall-clock budget (s) for OCR tiles and region encoding
+IMAGE_INGEST_BUDGET_S = float(os.getenv("IMAGE_INGEST_BUDGET_S", "120"))
+
+# ---------------------------
+# Vector index snapshots
+# ---------------------------
+# Records per batch when streaming a collection to or from a snapshot
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "1000"))
+
+# ---------------------------
+# Tracing & metrics
+# ---------------------------
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") == "1"
+TRACE_DIR = os.getenv("TRACE_DIR", os.path.join(PROJECT_ROOT, "traces"))
+TRACE_PATH = os.path.join(TRACE_DIR, "traces.jsonl")
+# Each process (UI, ingestion worker, ...) writes its own metrics file,
+# labelled with TRACE_PROCESS; set it when running several of one kind
+TRACE_PROCESS = os.getenv("TRACE_PROCESS") or re.sub(
+    r"[^A-Za-z0-9_-]", "_", os.path.splitext(os.path.basename(sys.argv[0] if sys.argv else ""))[0]
+).strip("_-") or "python"
+METRICS_PATH = os.path.join(TRACE_DIR, f"metrics_{TRACE_PROCESS}.prom")
+
+# ---------------------------
+# LLM provider
+# ---------------------------
+# "groq", "openai" (OpenAI-compatible server, e.g. llama.cpp) or "stub"
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# Requests per minute per provider; 0 means no rate limit
+LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "0"))
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0"))
+
+# ---------------------------
+# Conversation memory
+# ---------------------------
+# Estimated tokens of chat history kept in the prompt before older
+# turns are summarized; the newest HISTORY_KEEP_TURNS stay verbatim
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1200"))
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "2"))
+# Reuse the previous turn's chunks when the new query is this similar
+CONTEXT_REUSE_SIMILARITY = float(os.getenv("CONTEXT_REUSE_SIMILARITY", "0.8"))
+
+# ---------------------------
+# Models & warm-up
+# ---------------------------
+# Local model cache; populate it once (python run_warmup.py --download)
+# and set MODELS_OFFLINE=1 so pods never touch the network
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", os.path.join(PROJECT_ROOT, "models_cache"))
+MODELS_OFFLINE = os.getenv("MODELS_OFFLINE", "0") == "1"
+# "torch", "onnx" or "openvino" for the text embedding model
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+# Models warmed at startup: any of text, clip, ocr
+WARMUP_MODELS = [m.strip() for m in os.getenv("WARMUP_MODELS", "text,clip,ocr").split(",") if m.strip()]
 
 # ---------------------------
 # Ensure directories exist
 # ---------------------------
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(CHROMA_PATH, exist_ok=True)
+os.makedirs(TRACE_DIR, exist_ok=True)
+os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
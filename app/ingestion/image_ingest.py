@@ -2,27 +2,40 @@
 
 import os
 import re
+import time
 import chromadb
-import easyocr
 import numpy as np
 
 from PIL import Image
-from sentence_transformers import SentenceTransformer
 
-from app.config import CHROMA_PATH
+from app.config import (
+    CHROMA_PATH,
+    OCR_TILE_SIZE,
+    MAX_IMAGE_PIXELS,
+    CLIP_REGION_SIZE,
+    CLIP_MAX_REGIONS,
+    CLIP_BATCH_SIZE,
+    IMAGE_INGEST_BUDGET_S,
+)
+from app.ingestion.memory_guard import MemoryThrottle
+from app.tracing import span
+from app.models import (
+    get_text_embedder,
+    get_clip_model,
+    get_ocr_reader,
+    TEXT_EMBED_MODEL,
+    IMAGE_EMBED_MODEL
+)
 
-# -------------------------------------------------
-# Models & OCR Initialization
-# -------------------------------------------------
-TEXT_EMBED_MODEL = "all-MiniLM-L6-v2"
-IMAGE_EMBED_MODEL = "clip-ViT-B-32"
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
 
-text_embedder = SentenceTransformer(TEXT_EMBED_MODEL)
-image_embedder = SentenceTransformer(IMAGE_EMBED_MODEL)
+# CLIP works on 224px inputs; downscale before encoding instead of
+# handing it a full-resolution scan
+CLIP_MAX_SIDE = 1024
+CLIP_REGION_MAX_SIDE = 448
 
-# Initialize EasyOCR Reader (English)
-# Set gpu=True if you have a GPU available
-ocr_reader = easyocr.Reader(['en'], gpu=False)
+# Whole-image region documents keep at most this much OCR text
+REGION_TEXT_MAX_CHARS = 1000
 
 # -------------------------------------------------
 # OCR Text Cleaning
@@ -52,18 +65,174 @@ def chunk_text(text, chunk_size=60, overlap=15):
 
     return chunks
 
+# -------------------------------------------------
+# Tiled OCR (large images)
+# -------------------------------------------------
+OCR_TILE_OVERLAP = 64
+
+
+def iter_tiles(width, height, tile_size=OCR_TILE_SIZE, overlap=OCR_TILE_OVERLAP):
+    """
+    Yield (left, top, right, bottom) boxes covering the image.
+    Tiles overlap slightly so words on a tile border are not cut.
+    """
+    step = max(tile_size - overlap, 1)
+    for top in range(0, height, step):
+        for left in range(0, width, step):
+            yield (left, top, min(left + tile_size, width), min(top + tile_size, height))
+            if left + tile_size >= width:
+                break
+        if top + tile_size >= height:
+            break
+
+
+def tile_core(tile, width, height, overlap=OCR_TILE_OVERLAP):
+    """
+    Part of a tile it owns: overlap strips shared with a neighbour are
+    split down the middle, so text read twice is kept only once.
+    """
+    left, top, right, bottom = tile
+    half = overlap / 2
+    return (
+        left + half if left > 0 else left,
+        top + half if top > 0 else top,
+        right - half if right < width else right,
+        bottom - half if bottom < height else bottom,
+    )
+
+
+def _quad_to_box(quad, dx=0, dy=0):
+    xs = [p[0] for p in quad]
+    ys = [p[1] for p in quad]
+    return (int(min(xs)) + dx, int(min(ys)) + dy, int(max(xs)) + dx, int(max(ys)) + dy)
+
+
+def ocr_image(img, throttle=None, deadline=None, stats=None):
+    """
+    Run EasyOCR (detail=1) over an image, tile by tile when it is larger
+    than OCR_TILE_SIZE, so only one tile is copied into numpy at a time.
+
+    Returns [{"box": (x0, y0, x1, y1), "text": str}] in full-image
+    coordinates. Tiles left when the deadline passes are skipped.
+    Tile counts are recorded in stats (a span's attrs) when given.
+    """
+    width, height = img.size
+    if width <= OCR_TILE_SIZE and height <= OCR_TILE_SIZE:
+        # EasyOCR needs a numpy array or file path
+        return [
+            {"box": _quad_to_box(quad), "text": text}
+            for quad, text, _conf in get_ocr_reader().readtext(np.array(img), detail=1)
+        ]
+
+    tiles = list(iter_tiles(width, height))
+    if stats is not None:
+        stats["tiles"] = len(tiles)
+
+    results = []
+    duplicates = 0
+    for done, tile in enumerate(tiles):
+        if deadline and time.monotonic() > deadline:
+            print(f"⏱️ [OCR] Time budget reached, {len(tiles) - done} tiles skipped")
+            if stats is not None:
+                stats["tiles_skipped"] = len(tiles) - done
+            break
+        if throttle:
+            throttle.wait(f"tile {done + 1}")
+        tile_np = np.array(img.crop(tile))
+        core_x0, core_y0, core_x1, core_y1 = tile_core(tile, width, height)
+        for quad, text, _conf in get_ocr_reader().readtext(tile_np, detail=1):
+            box = _quad_to_box(quad, tile[0], tile[1])
+            cx, cy = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+            # Centre in a neighbour's half of the overlap: that tile keeps it
+            if not (core_x0 <= cx < core_x1 and core_y0 <= cy < core_y1):
+                duplicates += 1
+                continue
+            results.append({"box": box, "text": text})
+        del tile_np
+
+    if stats is not None:
+        stats["overlap_dropped"] = duplicates
+    return results
+
+# -------------------------------------------------
+# CLIP Regions
+# -------------------------------------------------
+def region_boxes(width, height, region_size=CLIP_REGION_SIZE, max_regions=CLIP_MAX_REGIONS):
+    """
+    Region 0 is the whole image; the rest is a grid of overlapping
+    tiles, grown until there are at most max_regions of them
+    (max_regions < 1 means the whole image only).
+    """
+    boxes = [(0, 0, width, height)]
+    if width <= region_size and height <= region_size or max_regions < 1:
+        return boxes
+
+    while True:
+        grid = list(iter_tiles(width, height, tile_size=region_size, overlap=region_size // 8))
+        if len(grid) <= max_regions:
+            return boxes + grid
+        region_size = int(region_size * 1.5)
+
+
+def assign_ocr_to_regions(ocr_results, boxes):
+    """
+    Map each OCR box to the grid region whose centre is closest to the
+    box centre (among regions containing it). Returns text per region.
+    """
+    texts = [[] for _ in boxes]
+
+    for item in ocr_results:
+        x0, y0, x1, y1 = item["box"]
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        texts[0].append(item["text"])
+
+        best, best_dist = None, None
+        for idx, (left, top, right, bottom) in enumerate(boxes[1:], start=1):
+            if left <= cx < right and top <= cy < bottom:
+                dist = (cx - (left + right) / 2) ** 2 + (cy - (top + bottom) / 2) ** 2
+                if best_dist is None or dist < best_dist:
+                    best, best_dist = idx, dist
+        if best is not None:
+            texts[best].append(item["text"])
+
+    return [clean_ocr_text(" ".join(t)) for t in texts]
+
+
+def _downscale(img, max_side):
+    """Resized copy no larger than max_side (resize avoids a full-size copy)."""
+    width, height = img.size
+    scale = max_side / max(width, height)
+    if scale >= 1:
+        return img
+    return img.resize((max(int(width * scale), 1), max(int(height * scale), 1)), Image.BICUBIC)
+
 # -------------------------------------------------
 # Image Ingestion
 # -------------------------------------------------
-def ingest_image(image_path: str):
+def ingest_image(image_path: str, progress_callback=None):
     """
     Ingest image with EasyOCR + CLIP embeddings into ChromaDB
+
+    The whole image and each grid region get a CLIP embedding in
+    image_docs, with the OCR text that falls inside the region as the
+    document. OCR tiles and region encoding stop at IMAGE_INGEST_BUDGET_S.
+
+    progress_callback(steps_done, total_steps) is called after OCR,
+    after the OCR chunks are stored and after the region embeddings.
+    Load, OCR and embedding errors are logged and re-raised, so an
+    ingestion job ends up FAILED (and retryable) instead of done.
     """
+    with span("ingest", kind="image", file=os.path.basename(image_path)):
+        return _ingest_image(image_path, progress_callback)
+
+
+def _ingest_image(image_path, progress_callback):
 
     if not os.path.exists(image_path):
         raise FileNotFoundError(f"Image not found: {image_path}")
 
     print(f"\n🖼️ [IMAGE INGEST] Starting: {image_path}")
+    deadline = time.monotonic() + IMAGE_INGEST_BUDGET_S
 
     client = chromadb.PersistentClient(path=CHROMA_PATH)
 
@@ -71,6 +240,7 @@ def ingest_image(image_path: str):
     image_collection = client.get_or_create_collection("image_docs")
 
     file_name = os.path.basename(image_path)
+    throttle = MemoryThrottle(file_name)
 
     # -------------------------------------------------
     # Load image
@@ -79,70 +249,120 @@ def ingest_image(image_path: str):
         img = Image.open(image_path).convert("RGB")
     except Exception as e:
         print(f"❌ [IMAGE LOAD ERROR]: {e}")
-        return
+        raise
+
+    width, height = img.size
 
     # -------------------------------------------------
     # EasyOCR Extraction
     # -------------------------------------------------
     try:
-        # EasyOCR needs a numpy array or file path
-        img_np = np.array(img)
-        results = ocr_reader.readtext(img_np, detail=0)
-        
-        raw_text = " ".join(results)
+        with span("ocr", pixels=width * height) as s:
+            ocr_results = ocr_image(img, throttle=throttle, deadline=deadline, stats=s)
+            s["boxes"] = len(ocr_results)
+
+        raw_text = " ".join(item["text"] for item in ocr_results)
         ocr_text = clean_ocr_text(raw_text)
-        
+
         print(f"🔍 [OCR] Clean text length: {len(ocr_text)}")
     except Exception as e:
         print(f"❌ [OCR ERROR]: {e}")
-        return
+        raise
+
+    if progress_callback:
+        progress_callback(1, 3)
 
     # -------------------------------------------------
     # Store OCR text as CHUNKED embeddings
     # -------------------------------------------------
     if len(ocr_text) > 50:
         chunks = chunk_text(ocr_text)
-        print(f"[DEBUG] OCR chunks created: {len(chunks)}")
 
-        for idx, chunk in enumerate(chunks):
-            if len(chunk.strip()) < 30:
-                continue
+        kept = [(idx, chunk) for idx, chunk in enumerate(chunks) if len(chunk.strip()) >= 30]
+
+        if kept:
+            docs = [chunk for _, chunk in kept]
 
-            embedding = text_embedder.encode(chunk).tolist()
+            with span("text_embed", model=TEXT_EMBED_MODEL, chunks=len(docs),
+                      bytes=sum(len(d) for d in docs)):
+                embeddings = get_text_embedder().encode(docs).tolist()
 
-            text_collection.add(
-                documents=[chunk],
-                embeddings=[embedding],
-                metadatas=[{
-                    "source": file_name,
-                    "type": "image_ocr"
-                }],
-                ids=[f"{file_name}_ocr_{idx}"]
-            )
+            with span("chroma_write", collection="text_docs", chunks=len(docs)):
+                text_collection.upsert(
+                    documents=docs,
+                    embeddings=embeddings,
+                    metadatas=[{
+                        "source": file_name,
+                        "type": "image_ocr"
+                    } for _ in docs],
+                    ids=[f"{file_name}_ocr_{idx}" for idx, _ in kept]
+                )
 
         print(f"✅ [IMAGE INGEST] OCR text chunks added: {len(chunks)}")
     else:
         print("⚠️ [IMAGE INGEST] OCR text too short, skipped")
 
+    if progress_callback:
+        progress_callback(2, 3)
+
     # -------------------------------------------------
-    # Store image embedding (CLIP)
+    # Store region embeddings (CLIP), whole image first
     # -------------------------------------------------
+    boxes = region_boxes(width, height)
+    region_texts = assign_ocr_to_regions(ocr_results, boxes)
+    stored = 0
+
     try:
-        image_embedding = image_embedder.encode(img).tolist()
+        for batch_start in range(0, len(boxes), CLIP_BATCH_SIZE):
+            # The whole-image region (batch 0) is always stored
+            if batch_start and time.monotonic() > deadline:
+                print(f"⏱️ [IMAGE INGEST] Time budget reached, {len(boxes) - batch_start} regions skipped")
+                break
 
-        image_collection.add(
-            documents=[file_name],
-            embeddings=[image_embedding],
-            metadatas=[{
-                "source": file_name,
-                "type": "image"
-            }],
-            ids=[f"{file_name}_clip"]
-        )
+            throttle.wait(f"regions {batch_start}+")
+            batch = list(range(batch_start, min(batch_start + CLIP_BATCH_SIZE, len(boxes))))
+            crops = [
+                _downscale(img, CLIP_MAX_SIDE) if idx == 0
+                else _downscale(img.crop(boxes[idx]), CLIP_REGION_MAX_SIDE)
+                for idx in batch
+            ]
 
-        print("✅ [IMAGE INGEST] Image embedding stored")
+            with span("clip_encode", model=IMAGE_EMBED_MODEL, images=len(crops)):
+                embeddings = get_clip_model().encode(
+                    crops, batch_size=CLIP_BATCH_SIZE, normalize_embeddings=True
+                ).tolist()
+            del crops
+
+            with span("chroma_write", collection="image_docs", chunks=len(batch)):
+                image_collection.upsert(
+                    documents=[
+                        region_texts[idx][:REGION_TEXT_MAX_CHARS] or file_name
+                        for idx in batch
+                    ],
+                    embeddings=embeddings,
+                    metadatas=[{
+                        "source": file_name,
+                        "path": os.path.abspath(image_path),
+                        "type": "image" if idx == 0 else "image_region",
+                        "region": idx,
+                        "x0": boxes[idx][0],
+                        "y0": boxes[idx][1],
+                        "x1": boxes[idx][2],
+                        "y1": boxes[idx][3],
+                        "has_ocr": bool(region_texts[idx]),
+                    } for idx in batch],
+                    # Region 0 keeps the old whole-image id
+                    ids=[f"{file_name}_clip" if idx == 0 else f"{file_name}_r{idx}" for idx in batch]
+                )
+            stored += len(batch)
+
+        print(f"✅ [IMAGE INGEST] Region embeddings stored: {stored}/{len(boxes)}")
 
     except Exception as e:
         print(f"❌ [IMAGE EMBEDDING ERROR]: {e}")
+        raise
+
+    if progress_callback:
+        progress_callback(3, 3)
 
     print("💾 [IMAGE INGEST] Data auto-persisted by ChromaDB")
\ No newline at end of file
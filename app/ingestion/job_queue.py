@@ -0,0 +1,395 @@
+# app/ingestion/job_queue.py
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.config import (
+    JOBS_DB_PATH,
+    INGEST_WORKERS,
+    JOB_HEARTBEAT_SECONDS,
+    JOB_STALE_SECONDS
+)
+from app.ingestion.memory_guard import MemoryThrottle
+
+# -------------------------------------------------
+# Job States
+# -------------------------------------------------
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+PDF_EXTENSIONS = (".pdf",)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    owner TEXT,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# Columns added after the first release, for existing databases
+_MIGRATIONS = {
+    "owner": "ALTER TABLE jobs ADD COLUMN owner TEXT",
+    "heartbeat_at": "ALTER TABLE jobs ADD COLUMN heartbeat_at REAL",
+}
+_migrated = set()
+
+# Identifies the process that claimed a job ("host:pid:nonce"). The nonce
+# tells processes apart after a container restart, which keeps the
+# hostname and often hands the new server the same PID.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Serializes job claiming across worker threads of one process;
+# SQLite's write lock covers separate worker processes.
+_claim_lock = threading.Lock()
+
+
+# -------------------------------------------------
+# Database Connection
+# -------------------------------------------------
+def _connect(db_path=JOBS_DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(_SCHEMA)
+
+    if db_path not in _migrated:
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, ddl in _MIGRATIONS.items():
+            if column not in columns:
+                try:
+                    conn.execute(ddl)
+                except sqlite3.OperationalError:
+                    pass  # another process added it first
+        _migrated.add(db_path)
+
+    return conn
+
+
+def _owner_alive(owner):
+    """
+    True/False if the owning process is known to be alive/dead, None when
+    that can't be told from here (another host, or not a POSIX system).
+    """
+    if not owner:
+        return None
+    if owner == WORKER_ID:
+        return True
+
+    # "host:pid:nonce" (older rows: "host:pid")
+    parts = owner.split(":")
+    host, pid = parts[0], parts[1] if len(parts) > 1 else ""
+    if host != socket.gethostname() or not pid.isdigit():
+        return None
+    if int(pid) == os.getpid():
+        # Our PID, another nonce: a previous incarnation of this process
+        return False
+    if os.name != "posix":
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _detect_kind(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTENSIONS:
+        return "pdf"
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+# -------------------------------------------------
+# Queue Operations
+# -------------------------------------------------
+def submit_job(path: str, db_path=JOBS_DB_PATH):
+    """
+    Queue a file for background ingestion and return its job id.
+    """
+    kind = _detect_kind(path)
+    now = time.time()
+
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute(
+            "INSERT INTO jobs (path, kind, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (os.path.abspath(path), kind, QUEUED, now, now)
+        )
+        return cur.lastrowid
+    finally:
+        conn.close()
+
+
+def claim_next_job(db_path=JOBS_DB_PATH):
+    """
+    Atomically move the oldest queued job to RUNNING and return it.
+    Returns None when the queue is empty.
+    """
+    with _claim_lock:
+        conn = _connect(db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY id LIMIT 1",
+                (QUEUED,)
+            ).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (RUNNING, WORKER_ID, now, now, row["id"])
+            )
+            conn.execute("COMMIT")
+
+            job = dict(row)
+            job.update(status=RUNNING, owner=WORKER_ID, heartbeat_at=now)
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+def update_progress(job_id: int, progress: int, total: int, db_path=JOBS_DB_PATH):
+    """
+    Checkpoint a job. For PDFs progress is the number of pages done,
+    so a resumed job restarts at the first unfinished page.
+    """
+    now = time.time()
+
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET progress = ?, total = ?, heartbeat_at = ?, updated_at = ? "
+            "WHERE id = ?",
+            (progress, total, now, now, job_id)
+        )
+    finally:
+        conn.close()
+
+
+def heartbeat(db_path=JOBS_DB_PATH):
+    """
+    Mark every job this process is running as still alive. Long pages and
+    images can go minutes between checkpoints, so this runs on a timer.
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND owner = ?",
+            (time.time(), RUNNING, WORKER_ID)
+        )
+    finally:
+        conn.close()
+
+
+def finish_job(job_id: int, error: str = None, db_path=JOBS_DB_PATH):
+    status = FAILED if error else DONE
+
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, error, time.time(), job_id)
+        )
+    finally:
+        conn.close()
+
+
+def requeue_interrupted_jobs(stale_after: float = JOB_STALE_SECONDS, db_path=JOBS_DB_PATH):
+    """
+    Put RUNNING jobs left behind by a crashed or restarted worker back
+    in the queue. Their progress column is kept so they resume.
+
+    A job is interrupted when its owner process is known to be dead, or
+    when its heartbeat is older than stale_after (owners on other hosts,
+    hung processes). Jobs of live workers in any process are left alone.
+    """
+    now = time.time()
+
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT id, owner, COALESCE(heartbeat_at, updated_at) AS beat "
+            "FROM jobs WHERE status = ?",
+            (RUNNING,)
+        ).fetchall()
+
+        requeued = 0
+        for row in rows:
+            if _owner_alive(row["owner"]) is False or row["beat"] <= now - stale_after:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, updated_at = ? WHERE id = ?",
+                    (QUEUED, now, row["id"])
+                )
+                requeued += 1
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    if requeued:
+        print(f"🔁 [JOB QUEUE] Requeued {requeued} interrupted jobs")
+    return requeued
+
+
+def retry_failed_jobs(db_path=JOBS_DB_PATH):
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute(
+            "UPDATE jobs SET status = ?, error = NULL, updated_at = ? WHERE status = ?",
+            (QUEUED, time.time(), FAILED)
+        )
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def list_jobs(limit: int = 50, db_path=JOBS_DB_PATH):
+    """
+    Most recent jobs first, as plain dicts (for the UI status view).
+    """
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT * FROM jobs ORDER BY id DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def clear_finished_jobs(db_path=JOBS_DB_PATH):
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute("DELETE FROM jobs WHERE status = ?", (DONE,))
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+# -------------------------------------------------
+# Job Execution
+# -------------------------------------------------
+def run_job(job, db_path=JOBS_DB_PATH):
+    """
+    Run one claimed job, checkpointing progress as it goes.
+    """
+    # Imported lazily so submitting jobs does not load the embedding models
+    from app.ingestion.pdf_ingest import ingest_pdf
+    from app.ingestion.image_ingest import ingest_image
+
+    job_id = job["id"]
+
+    def checkpoint(done, total):
+        update_progress(job_id, done, total, db_path=db_path)
+
+    print(f"\n🧾 [JOB {job_id}] {job['kind']} -> {job['path']} (resume at {job['progress']})")
+
+    try:
+        if job["kind"] == "pdf":
+            ingest_pdf(job["path"], start_page=job["progress"], progress_callback=checkpoint)
+        else:
+            # Images are a single OCR + CLIP pass; upserts make a rerun safe
+            ingest_image(job["path"], progress_callback=checkpoint)
+    except Exception as e:
+        print(f"❌ [JOB {job_id}] Failed: {e}")
+        finish_job(job_id, error=str(e), db_path=db_path)
+        return False
+
+    finish_job(job_id, db_path=db_path)
+    print(f"✅ [JOB {job_id}] Done")
+    return True
+
+
+def worker_loop(stop_event=None, poll_interval: float = 1.0, db_path=JOBS_DB_PATH):
+    """
+    Process jobs until stop_event is set.
+    """
+    throttle = MemoryThrottle(threading.current_thread().name)
+
+    while stop_event is None or not stop_event.is_set():
+        # Don't start another file while the process is over its RSS ceiling
+        throttle.wait()
+        job = claim_next_job(db_path=db_path)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        run_job(job, db_path=db_path)
+
+
+def maintenance_loop(stop_event, interval: float = JOB_HEARTBEAT_SECONDS,
+                     stale_after: float = JOB_STALE_SECONDS, db_path=JOBS_DB_PATH):
+    """
+    Heartbeat this process's jobs and pick up jobs interrupted elsewhere,
+    so a crash is recovered without waiting for a restart.
+    """
+    while not stop_event.wait(interval):
+        try:
+            heartbeat(db_path=db_path)
+            requeue_interrupted_jobs(stale_after=stale_after, db_path=db_path)
+        except sqlite3.Error as e:
+            print(f"⚠️ [JOB QUEUE] Maintenance failed: {e}")
+
+
+def start_workers(num_workers: int = INGEST_WORKERS, stale_after: float = JOB_STALE_SECONDS,
+                  db_path=JOBS_DB_PATH):
+    """
+    Start daemon worker threads in this process.
+    Returns the stop event used to shut them down.
+
+    Several processes (UI, run_ingest_worker.py) can share one queue;
+    each only requeues jobs whose owner is dead or has gone silent.
+    """
+    requeue_interrupted_jobs(stale_after=stale_after, db_path=db_path)
+
+    stop_event = threading.Event()
+    threading.Thread(
+        target=maintenance_loop,
+        args=(stop_event,),
+        kwargs={"stale_after": stale_after, "db_path": db_path},
+        name="ingest-maintenance",
+        daemon=True
+    ).start()
+
+    for i in range(num_workers):
+        threading.Thread(
+            target=worker_loop,
+            kwargs={"stop_event": stop_event, "db_path": db_path},
+            name=f"ingest-worker-{i}",
+            daemon=True
+        ).start()
+
+    print(f"🧵 [JOB QUEUE] Started {num_workers} ingestion workers")
+    return stop_event
@@ -0,0 +1,110 @@
+# app/ingestion/memory_guard.py
+
+import gc
+import os
+import resource
+import sys
+import time
+
+from app.config import MAX_RSS_MB, MEMORY_THROTTLE_TIMEOUT
+
+# -------------------------------------------------
+# Resident Set Size
+# -------------------------------------------------
+def current_rss_mb() -> float:
+    """
+    Current RSS of this process in MB.
+    Uses /proc on Linux, psutil if available, otherwise the peak RSS.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KB elsewhere
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+# -------------------------------------------------
+# Throttling
+# -------------------------------------------------
+def wait_for_memory(label: str = "", ceiling_mb: float = MAX_RSS_MB,
+                    timeout: float = MEMORY_THROTTLE_TIMEOUT, poll_interval: float = 0.5):
+    """
+    Block while RSS is above ceiling_mb so other workers can finish and
+    release memory. A ceiling of 0 disables the guard.
+
+    Returns True if memory is under the ceiling, False if the wait timed
+    out (the caller proceeds anyway rather than stalling forever).
+    """
+    if not ceiling_mb:
+        return True
+
+    rss = current_rss_mb()
+    if rss <= ceiling_mb:
+        return True
+
+    gc.collect()
+    deadline = time.monotonic() + timeout
+    print(f"⏸️ [MEMORY] {label} RSS {rss:.0f} MB > {ceiling_mb:.0f} MB, throttling")
+
+    while time.monotonic() < deadline:
+        rss = current_rss_mb()
+        if rss <= ceiling_mb:
+            print(f"▶️ [MEMORY] {label} resumed at {rss:.0f} MB")
+            return True
+        time.sleep(poll_interval)
+
+    print(f"⚠️ [MEMORY] {label} still at {rss:.0f} MB after {timeout:.0f}s, continuing")
+    return False
+
+
+class MemoryThrottle:
+    """
+    wait_for_memory() for a loop (pages of a PDF, tiles, jobs).
+
+    Process RSS rarely shrinks once Python and torch have allocated it,
+    so a ceiling at or below the steady state would otherwise cost a
+    full timeout on every iteration. After one timeout the throttle
+    stops waiting until RSS has been back under the ceiling.
+    """
+
+    def __init__(self, label: str = "", ceiling_mb: float = MAX_RSS_MB,
+                 timeout: float = MEMORY_THROTTLE_TIMEOUT):
+        self.label = label
+        self.ceiling_mb = ceiling_mb
+        self.timeout = timeout
+        self.suspended = False
+
+    def wait(self, step: str = ""):
+        if not self.ceiling_mb:
+            return True
+
+        if self.suspended:
+            if current_rss_mb() > self.ceiling_mb:
+                return False
+            self.suspended = False
+
+        label = f"{self.label} {step}".strip()
+        if wait_for_memory(label, self.ceiling_mb, self.timeout):
+            return True
+
+        self.suspended = True
+        print(f"⚠️ [MEMORY] {self.label}: RSS stays above {self.ceiling_mb:.0f} MB, "
+              f"not throttling until it drops (is MAX_RSS_MB below the steady state?)")
+        return False
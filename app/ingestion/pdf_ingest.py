@@ -1,44 +1,73 @@
 import os
 import fitz  # PyMuPDF
-from pypdf import PdfReader
 from PIL import Image
 import chromadb
-from sentence_transformers import SentenceTransformer
 from app.config import CHROMA_PATH
-
-# -------------------------------------------------
-# Embedding Model (MUST MATCH RETRIEVER)
-# -------------------------------------------------
-EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
-embed_model = SentenceTransformer(EMBED_MODEL_NAME)
+from app.ingestion.memory_guard import MemoryThrottle
+from app.tracing import span
+from app.models import get_text_embedder, TEXT_EMBED_MODEL
 
 # -------------------------------------------------
 # Text Chunking
 # -------------------------------------------------
-def chunk_text(text, chunk_size=400, overlap=80):
+def iter_chunks(text, chunk_size=400, overlap=80):
     """
-    Split text into overlapping chunks
+    Yield overlapping chunks one at a time
     """
     words = text.split()
-    chunks = []
 
     start = 0
     while start < len(words):
         chunk = " ".join(words[start:start + chunk_size])
         if chunk.strip():
-            chunks.append(chunk)
+            yield chunk
         start += chunk_size - overlap
 
-    return chunks
+
+def chunk_text(text, chunk_size=400, overlap=80):
+    """
+    Split text into overlapping chunks
+    """
+    return list(iter_chunks(text, chunk_size, overlap))
+
+# -------------------------------------------------
+# Page Streaming
+# -------------------------------------------------
+def iter_pdf_pages(pdf_path: str, start_page: int = 0):
+    """
+    Yield (page_idx, total_pages, text) one page at a time.
+
+    PyMuPDF reads pages lazily from the file, so only the current page
+    is held in memory even for multi-thousand-page documents.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        total_pages = doc.page_count
+        for page_idx in range(start_page, total_pages):
+            page = doc.load_page(page_idx)
+            text = page.get_text() or ""
+            del page
+            yield page_idx, total_pages, text
+    finally:
+        doc.close()
 
 # -------------------------------------------------
 # PDF Ingestion
 # -------------------------------------------------
-def ingest_pdf(pdf_path: str):
+def ingest_pdf(pdf_path: str, start_page: int = 0, progress_callback=None):
     """
     Ingest a PDF file into ChromaDB.
     OCR fallback removed for cloud compatibility (Streamlit).
+
+    start_page lets an interrupted job resume from its last checkpoint.
+    progress_callback(pages_done, total_pages) is called after each page.
     """
+    with span("ingest", kind="pdf", file=os.path.basename(pdf_path)) as s:
+        s["chunks"] = _ingest_pdf(pdf_path, start_page, progress_callback)
+        return s["chunks"]
+
+
+def _ingest_pdf(pdf_path, start_page, progress_callback):
 
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
@@ -56,53 +85,61 @@ def ingest_pdf(pdf_path: str):
     print(f"📦 [CHROMA] Using path: {CHROMA_PATH}")
     print(f"📦 [CHROMA] Existing docs: {collection.count()}")
 
-    # -------------------------------------------------
-    # PDF Readers
-    # -------------------------------------------------
-    reader = PdfReader(pdf_path)
     file_name = os.path.basename(pdf_path)
+    throttle = MemoryThrottle(file_name)
     added_chunks = 0
 
     # -------------------------------------------------
-    # Process Pages
+    # Process Pages (one at a time)
     # -------------------------------------------------
-    for page_idx, page in enumerate(reader.pages):
-        # Extract text using pypdf
-        text = page.extract_text() or ""
+    for page_idx, total_pages, text in iter_pdf_pages(pdf_path, start_page):
+        throttle.wait(f"p{page_idx + 1}")
 
-        # Safe Fallback: If pypdf fails, skip the page (Removes Tesseract dependency)
+        # Safe Fallback: If extraction fails, skip the page (Removes Tesseract dependency)
         if not text.strip():
             print(f"⚠️ [SKIP] Page {page_idx + 1}: No extractable text found (scanned image).")
+            if progress_callback:
+                progress_callback(page_idx + 1, total_pages)
             continue
 
         # -------------------------------------------------
-        # Chunk & Embed
+        # Chunk & Embed (batched per page)
         # -------------------------------------------------
-        chunks = chunk_text(text)
+        chunks, doc_ids = [], []
 
-        for chunk_idx, chunk in enumerate(chunks):
+        for chunk_idx, chunk in enumerate(iter_chunks(text)):
             # Ignore tiny fragments
             if len(chunk.strip()) < 30:
                 continue
-
-            # Generate vector embedding
-            embedding = embed_model.encode(chunk).tolist()
-
-            doc_id = f"{file_name}_p{page_idx}_c{chunk_idx}"
-
-            collection.add(
-                documents=[chunk],
-                embeddings=[embedding],
-                metadatas=[{
-                    "source": file_name,
-                    "page": page_idx + 1,
-                    "type": "pdf"
-                }],
-                ids=[doc_id]
-            )
-
-            added_chunks += 1
+            chunks.append(chunk)
+            doc_ids.append(f"{file_name}_p{page_idx}_c{chunk_idx}")
+
+        if chunks:
+            # Generate vector embeddings
+            with span("text_embed", model=TEXT_EMBED_MODEL, chunks=len(chunks),
+                      bytes=sum(len(c) for c in chunks)):
+                embeddings = get_text_embedder().encode(chunks).tolist()
+
+            # upsert keeps a resumed page idempotent
+            with span("chroma_write", collection="text_docs", chunks=len(chunks)):
+                collection.upsert(
+                    documents=chunks,
+                    embeddings=embeddings,
+                    metadatas=[{
+                        "source": file_name,
+                        "page": page_idx + 1,
+                        "type": "pdf"
+                    } for _ in chunks],
+                    ids=doc_ids
+                )
+
+            added_chunks += len(chunks)
+
+        if progress_callback:
+            progress_callback(page_idx + 1, total_pages)
 
     print(f"✅ [PDF INGEST] Completed")
     print(f"📦 [PDF INGEST] Total chunks added: {added_chunks}")
-    print(f"💾 [PDF INGEST] Data auto-persisted by ChromaDB")
\ No newline at end of file
+    print(f"💾 [PDF INGEST] Data auto-persisted by ChromaDB")
+
+    return added_chunks
\ No newline at end of file
@@ -0,0 +1,329 @@
+# app/ingestion/snapshot.py
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import chromadb
+import numpy as np
+
+from app.config import CHROMA_PATH, SNAPSHOT_BATCH_SIZE
+from app.models import TEXT_EMBED_MODEL, IMAGE_EMBED_MODEL
+from app.tracing import span
+
+# -------------------------------------------------
+# Vector Index Snapshots
+#
+# A snapshot is a directory with one sub-directory per collection:
+#   manifest.json     model, dimension, count, dtype, file checksums
+#   ids.jsonl         one id per line
+#   documents.jsonl   one document per line
+#   metadatas.jsonl   one metadata dict per line
+#   embeddings.bin    row-major little-endian float32/float16 matrix
+#
+# Columns are written and read in batches, so neither side ever holds a
+# whole collection in memory. Embeddings are stored as raw floats instead
+# of JSON to keep snapshots small and loading cheap.
+# -------------------------------------------------
+SNAPSHOT_VERSION = 1
+
+# Collection -> embedding model that produced its vectors
+COLLECTION_MODELS = {
+    "text_docs": TEXT_EMBED_MODEL,
+    "image_docs": IMAGE_EMBED_MODEL,
+}
+
+DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+COLUMN_FILES = ("ids.jsonl", "documents.jsonl", "metadatas.jsonl", "embeddings.bin")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _collection_names(client):
+    # list_collections() returns names on some chromadb versions, objects on others
+    return {getattr(c, "name", c) for c in client.list_collections()}
+
+
+def _read_manifest(collection_dir):
+    path = os.path.join(collection_dir, "manifest.json")
+    if not os.path.exists(path):
+        raise SnapshotError(f"No manifest in {collection_dir}")
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {manifest.get('version')} in {collection_dir}")
+    return manifest
+
+
+# -------------------------------------------------
+# Export
+# -------------------------------------------------
+def export_collection(collection, out_dir, dtype="float32", batch_size=SNAPSHOT_BATCH_SIZE):
+    """
+    Stream one collection into out_dir. Returns its manifest.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    total = collection.count()
+    dimension = None
+    exported = 0
+
+    with open(os.path.join(out_dir, "ids.jsonl"), "w", encoding="utf-8") as ids_f, \
+         open(os.path.join(out_dir, "documents.jsonl"), "w", encoding="utf-8") as docs_f, \
+         open(os.path.join(out_dir, "metadatas.jsonl"), "w", encoding="utf-8") as metas_f, \
+         open(os.path.join(out_dir, "embeddings.bin"), "wb") as emb_f:
+
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            if not batch["ids"]:
+                break
+
+            embeddings = np.asarray(batch["embeddings"], dtype=np.float32)
+            if dimension is None:
+                dimension = embeddings.shape[1]
+
+            for id_, doc, meta in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                ids_f.write(json.dumps(id_) + "\n")
+                docs_f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+                metas_f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+            emb_f.write(embeddings.astype(DTYPES[dtype]).tobytes())
+
+            exported += len(batch["ids"])
+            print(f"📤 [SNAPSHOT] {collection.name}: {exported}/{total}")
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "collection": collection.name,
+        "model": COLLECTION_MODELS.get(collection.name),
+        "dimension": dimension,
+        "count": exported,
+        "dtype": dtype,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sha256": {name: _sha256(os.path.join(out_dir, name)) for name in COLUMN_FILES},
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def export_snapshot(out_dir, collections=tuple(COLLECTION_MODELS), dtype="float32",
+                    batch_size=SNAPSHOT_BATCH_SIZE):
+    """
+    Export collections into a snapshot directory.
+
+    Written to a temporary directory and renamed at the end, so an
+    interrupted export never leaves a half-written snapshot behind.
+    float16 halves the size at a rounding error of about 1e-3 per
+    component. Returns {collection: manifest}.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {', '.join(DTYPES)}")
+    if os.path.exists(out_dir):
+        raise SnapshotError(f"{out_dir} already exists")
+
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+    existing = _collection_names(client)
+    tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+
+    manifests = {}
+    try:
+        with span("snapshot_export", dtype=dtype) as s:
+            for name in collections:
+                if name not in existing:
+                    print(f"⚠️ [SNAPSHOT] Collection {name} not found, skipping")
+                    continue
+                manifests[name] = export_collection(
+                    client.get_collection(name), os.path.join(tmp_dir, name), dtype, batch_size
+                )
+            s["chunks"] = sum(m["count"] for m in manifests.values())
+        if not manifests:
+            raise SnapshotError("no collections to export")
+        os.rename(tmp_dir, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    counts = {name: manifest["count"] for name, manifest in manifests.items()}
+    print(f"✅ [SNAPSHOT] Exported {counts} to {out_dir}")
+    return manifests
+
+
+# -------------------------------------------------
+# Import
+# -------------------------------------------------
+def _iter_batches(collection_dir, manifest, batch_size):
+    """Yield (ids, documents, metadatas, embeddings) batches from the column files."""
+    dtype = np.dtype(DTYPES[manifest["dtype"]])
+    row_bytes = dtype.itemsize * manifest["dimension"]
+
+    with open(os.path.join(collection_dir, "ids.jsonl"), encoding="utf-8") as ids_f, \
+         open(os.path.join(collection_dir, "documents.jsonl"), encoding="utf-8") as docs_f, \
+         open(os.path.join(collection_dir, "metadatas.jsonl"), encoding="utf-8") as metas_f, \
+         open(os.path.join(collection_dir, "embeddings.bin"), "rb") as emb_f:
+
+        remaining = manifest["count"]
+        while remaining > 0:
+            n = min(batch_size, remaining)
+            ids = [json.loads(next(ids_f)) for _ in range(n)]
+            docs = [json.loads(next(docs_f)) for _ in range(n)]
+            metas = [json.loads(next(metas_f)) for _ in range(n)]
+
+            raw = emb_f.read(n * row_bytes)
+            if len(raw) != n * row_bytes:
+                raise SnapshotError(f"{collection_dir}: embeddings.bin is truncated")
+            embeddings = np.frombuffer(raw, dtype=dtype).reshape(n, manifest["dimension"])
+
+            yield ids, docs, metas, embeddings.astype(np.float32).tolist()
+            remaining -= n
+
+
+def _count_lines(path):
+    with open(path, "rb") as f:
+        return sum(block.count(b"\n") for block in iter(lambda: f.read(1024 * 1024), b""))
+
+
+def _validate(client, collection_dir, manifest, replace):
+    """
+    Everything that can be checked before writing: model, dimension
+    against the index being merged into, and file sizes. Runs for every
+    collection before any of them is touched.
+    """
+    name = manifest["collection"]
+
+    expected_model = COLLECTION_MODELS.get(name)
+    if expected_model and manifest["model"] != expected_model:
+        raise SnapshotError(
+            f"{name}: snapshot was built with {manifest['model']}, "
+            f"this deployment embeds queries with {expected_model}"
+        )
+
+    if not manifest["count"]:
+        return
+
+    if manifest["dtype"] not in DTYPES or not manifest["dimension"]:
+        raise SnapshotError(f"{name}: bad dtype/dimension in manifest")
+
+    expected_bytes = manifest["count"] * manifest["dimension"] * np.dtype(DTYPES[manifest["dtype"]]).itemsize
+    if os.path.getsize(os.path.join(collection_dir, "embeddings.bin")) != expected_bytes:
+        raise SnapshotError(f"{name}: embeddings.bin does not hold {manifest['count']} vectors")
+    for file_name in COLUMN_FILES[:3]:
+        if _count_lines(os.path.join(collection_dir, file_name)) != manifest["count"]:
+            raise SnapshotError(f"{name}: {file_name} does not hold {manifest['count']} records")
+
+    # Replacing discards the current vectors, so only a merge must match them
+    if replace or name not in _collection_names(client):
+        return
+    collection = client.get_collection(name)
+    if collection.count() == 0:
+        return
+    sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+    if len(sample) and len(sample[0]) != manifest["dimension"]:
+        raise SnapshotError(
+            f"{name}: snapshot dimension {manifest['dimension']} "
+            f"does not match existing index dimension {len(sample[0])}"
+        )
+
+
+def _swap_in(client, staging, name, attempts=3):
+    """
+    Rename the loaded staging collection to name. A query arriving between
+    the delete and the rename can recreate name as an empty collection
+    (get_or_create), which makes the rename fail; drop it and try again.
+    """
+    for attempt in range(attempts):
+        if name in _collection_names(client):
+            client.delete_collection(name)
+        try:
+            staging.modify(name=name)
+            return
+        except Exception as e:
+            if attempt == attempts - 1 or name not in _collection_names(client):
+                raise
+            print(f"⚠️ [SNAPSHOT] {name} was recreated during the swap, retrying: {e}")
+
+
+def _load_collection(collection, collection_dir, manifest, batch_size):
+    loaded = 0
+    if not manifest["count"]:
+        return loaded
+    for ids, docs, metas, embeddings in _iter_batches(collection_dir, manifest, batch_size):
+        collection.upsert(ids=ids, documents=docs, metadatas=metas, embeddings=embeddings)
+        loaded += len(ids)
+        print(f"📥 [SNAPSHOT] {collection.name}: {loaded}/{manifest['count']}")
+    return loaded
+
+
+def import_snapshot(snapshot_dir, collections=None, replace=False, verify=True,
+                    batch_size=SNAPSHOT_BATCH_SIZE):
+    """
+    Load a snapshot into the local ChromaDB.
+
+    By default records are upserted, merging with what is already indexed.
+    replace=True loads each collection under a temporary name and swaps
+    it in only once fully loaded, so the node ends up with exactly the
+    snapshot and a failed import leaves the live index untouched. A
+    query that recreates a collection mid-swap is dropped and the swap
+    retried; it may briefly see an empty collection.
+    Every collection is validated before anything is written.
+    Returns {collection: records imported}.
+    """
+    names = collections or sorted(
+        name for name in os.listdir(snapshot_dir)
+        if os.path.isdir(os.path.join(snapshot_dir, name))
+    )
+    manifests = {name: _read_manifest(os.path.join(snapshot_dir, name)) for name in names}
+
+    if verify:
+        for name, manifest in manifests.items():
+            for file_name, digest in manifest["sha256"].items():
+                if _sha256(os.path.join(snapshot_dir, name, file_name)) != digest:
+                    raise SnapshotError(f"{name}/{file_name} does not match its checksum")
+
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+    for name, manifest in manifests.items():
+        _validate(client, os.path.join(snapshot_dir, name), manifest, replace)
+
+    imported = {}
+
+    with span("snapshot_import", replace=replace) as s:
+        for name, manifest in manifests.items():
+            collection_dir = os.path.join(snapshot_dir, name)
+
+            if not replace:
+                collection = client.get_or_create_collection(name=name)
+                imported[name] = _load_collection(collection, collection_dir, manifest, batch_size)
+                continue
+
+            staging_name = f"{name}__import"
+            if staging_name in _collection_names(client):
+                client.delete_collection(staging_name)  # left over from a failed import
+            staging = client.create_collection(name=staging_name)
+            try:
+                imported[name] = _load_collection(staging, collection_dir, manifest, batch_size)
+            except BaseException:
+                client.delete_collection(staging_name)
+                raise
+
+            _swap_in(client, staging, name)
+
+        s["chunks"] = sum(imported.values())
+
+    print(f"✅ [SNAPSHOT] Imported {imported} into {CHROMA_PATH}")
+    return imported
@@ -0,0 +1,319 @@
+# app/llm/provider.py
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from app.config import (
+    LLM_PROVIDER,
+    LLM_MODEL,
+    LLM_BASE_URL,
+    LLM_CONNECT_TIMEOUT,
+    LLM_READ_TIMEOUT,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_MAX_CONCURRENCY,
+    LLM_RATE_LIMIT_RPM,
+    LLM_STUB_LATENCY,
+)
+from app.tracing import span, llm_usage
+
+load_dotenv()
+
+# -------------------------------------------------
+# Provider defaults
+# -------------------------------------------------
+DEFAULT_BASE_URLS = {
+    "groq": "https://api.groq.com/openai/v1",
+    "openai": "http://127.0.0.1:8080/v1",  # llama.cpp / vLLM / any OpenAI-compatible server
+}
+
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(RuntimeError):
+    """Raised when an LLM call fails after all retries."""
+
+
+class LLMResponse:
+    """
+    Minimal chat response; same .content / .response_metadata shape the
+    agents used from LangChain's ChatGroq.
+    """
+
+    def __init__(self, content, token_usage=None):
+        self.content = content
+        self.response_metadata = {"token_usage": token_usage or {}}
+
+
+# -------------------------------------------------
+# Shared HTTP client
+# -------------------------------------------------
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """
+    One pooled requests.Session per process, so keep-alive connections
+    are reused across every agent and worker thread.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=max(LLM_MAX_CONCURRENCY, 1),
+                max_retries=0,  # retries are handled with backoff below
+            )
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def backoff_delay(attempt, base=LLM_BACKOFF_BASE, cap=LLM_BACKOFF_MAX):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RateLimiter:
+    """
+    Spaces call starts evenly to stay under a requests-per-minute budget.
+    """
+
+    def __init__(self, rpm=LLM_RATE_LIMIT_RPM):
+        self.interval = 60.0 / rpm if rpm else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+# -------------------------------------------------
+# OpenAI-compatible backend (Groq, llama.cpp server, vLLM, ...)
+# -------------------------------------------------
+class OpenAICompatibleLLM:
+    def __init__(self, provider, base_url, api_key, model,
+                 timeout=(LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT),
+                 max_retries=LLM_MAX_RETRIES, max_concurrency=LLM_MAX_CONCURRENCY):
+        self.provider = provider
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        # Caps in-flight calls to this provider across all threads
+        self._slots = threading.BoundedSemaphore(max(max_concurrency, 1))
+        self._rate = RateLimiter()
+
+    def _headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def _payload(self, prompt, **params):
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            **params,
+        }
+
+    def _post(self, payload, stream=False):
+        """
+        POST with retries on connection errors, timeouts, 429 and 5xx.
+        Honours Retry-After when the server sends it, capped at
+        LLM_BACKOFF_MAX.
+
+        Returns (response, retries) holding one concurrency slot; the
+        caller must call _release(response) when done reading it. The
+        slot is not held while backing off between attempts.
+        """
+        session = get_http_session()
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            self._rate.wait()
+            self._slots.acquire()
+            try:
+                resp = session.post(
+                    self.url, json=payload, headers=self._headers(),
+                    timeout=self.timeout, stream=stream
+                )
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    resp.raise_for_status()
+                    return resp, attempt
+
+                last_error = LLMError(f"{self.provider} HTTP {resp.status_code}: {resp.text[:200]}")
+                retry_after = resp.headers.get("Retry-After")
+                self._release(resp)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._slots.release()
+                last_error = e
+                retry_after = None
+            except requests.HTTPError as e:
+                self._release(resp)
+                raise LLMError(f"{self.provider} request failed: {e}") from e
+            except BaseException:
+                self._slots.release()
+                raise
+
+            if attempt == self.max_retries:
+                break
+
+            try:
+                delay = min(max(float(retry_after), 0.0), LLM_BACKOFF_MAX) if retry_after \
+                    else backoff_delay(attempt)
+            except ValueError:
+                # HTTP-date form; not worth parsing for a capped wait
+                delay = backoff_delay(attempt)
+            print(f"⚠️ [LLM] {self.provider} attempt {attempt + 1} failed ({last_error}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        raise LLMError(f"{self.provider} failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def _release(self, resp):
+        resp.close()
+        self._slots.release()
+
+    def invoke(self, prompt, **params):
+        with span("llm_call", provider=self.provider, model=self.model) as s:
+            resp, retries = self._post(self._payload(prompt, **params))
+            try:
+                data = resp.json()
+            finally:
+                self._release(resp)
+
+            response = LLMResponse(
+                data["choices"][0]["message"]["content"],
+                token_usage=data.get("usage"),
+            )
+            s["retries"] = retries
+            s.update(llm_usage(response))
+            return response
+
+    def stream(self, prompt, **params):
+        """
+        Yield the completion as text deltas (server-sent events).
+        Closing the generator early closes the connection, so the server
+        stops generating tokens nobody will read.
+        """
+        with span("llm_call", provider=self.provider, model=self.model, stream=True) as s:
+            resp, retries = self._post(self._payload(prompt, stream=True, **params), stream=True)
+            s["retries"] = retries
+            chars = 0
+            # SSE has no charset in its content type; don't let requests guess latin-1
+            resp.encoding = "utf-8"
+            try:
+                for line in resp.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        chars += len(delta)
+                        yield delta
+            finally:
+                s["completion_chars"] = chars
+                self._release(resp)
+
+
+# -------------------------------------------------
+# Deterministic offline stub (tests / benchmarks)
+# -------------------------------------------------
+def stub_completion(prompt):
+    """
+    Deterministic answer for a prompt; shared with the stand-in server.
+    """
+    if "Respond with ONLY the label" in prompt:
+        return "TEXT_ONLY"
+    if "Return ONLY valid JSON" in prompt:
+        return json.dumps({
+            "title": "Stub bug report",
+            "description": "Deterministic stub output.",
+            "impact": "None (offline stub).",
+            "steps_to_reproduce": ["Run with LLM_PROVIDER=stub"],
+            "priority": "Low",
+        })
+    digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+    return f"Stub answer {digest}"
+
+
+class StubLLM:
+    def __init__(self, latency_s=LLM_STUB_LATENCY, max_concurrency=LLM_MAX_CONCURRENCY):
+        self.provider = "stub"
+        self.model = "stub"
+        self.latency_s = latency_s
+        self._slots = threading.BoundedSemaphore(max(max_concurrency, 1))
+
+    def invoke(self, prompt, **params):
+        with span("llm_call", provider="stub", model="stub") as s:
+            with self._slots:
+                if self.latency_s:
+                    time.sleep(self.latency_s)
+                content = stub_completion(prompt)
+
+            response = LLMResponse(content, token_usage={
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+            })
+            s.update(llm_usage(response))
+            return response
+
+    def stream(self, prompt, **params):
+        content = self.invoke(prompt, **params).content
+        for piece in content.split(" "):
+            yield piece + " "
+
+
+# -------------------------------------------------
+# Provider selection
+# -------------------------------------------------
+_llms = {}
+_llms_lock = threading.Lock()
+
+
+def get_llm(provider: str = None):
+    """
+    Shared LLM client for the configured provider (LLM_PROVIDER):
+    "groq", "openai" (any OpenAI-compatible server) or "stub".
+    """
+    provider = (provider or LLM_PROVIDER).lower()
+
+    with _llms_lock:
+        if provider not in _llms:
+            if provider == "stub":
+                _llms[provider] = StubLLM()
+            elif provider in DEFAULT_BASE_URLS:
+                api_key = os.getenv("LLM_API_KEY")
+                if provider == "groq":
+                    api_key = api_key or os.getenv("GROQ_API_KEY")
+                _llms[provider] = OpenAICompatibleLLM(
+                    provider,
+                    LLM_BASE_URL or DEFAULT_BASE_URLS[provider],
+                    api_key,
+                    LLM_MODEL,
+                )
+            else:
+                raise ValueError(f"Unknown LLM provider: {provider}")
+        return _llms[provider]
@@ -0,0 +1,98 @@
+# app/llm/stub_server.py
+#
+# Stand-in OpenAI-compatible chat server with deterministic answers.
+# Exercises the real HTTP path (pooling, timeouts, retries) offline:
+#
+#   python -m app.llm.stub_server --port 8088 --latency 0.2
+#   LLM_PROVIDER=openai LLM_BASE_URL=http://127.0.0.1:8088/v1 streamlit run app/ui/streamlit_app.py
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.llm.provider import stub_completion
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    latency_s = 0.0
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real server
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+        content = stub_completion(prompt)
+
+        if body.get("stream"):
+            self._stream(content, body.get("model", "stub"))
+            return
+
+        payload = json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+            },
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, content, model):
+        """Send the answer word by word as OpenAI-style server-sent events."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        for piece in content.split(" "):
+            chunk = {
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece + " "}}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8088, latency_s=0.0):
+    StubChatHandler.latency_s = latency_s
+    server = ThreadingHTTPServer((host, port), StubChatHandler)
+    print(f"🤖 [STUB LLM] Serving on http://{host}:{port}/v1")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    try:
+        serve(args.host, args.port, args.latency).serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,138 @@
+# app/models.py
+
+import threading
+import time
+
+from app.config import (
+    MODEL_CACHE_DIR,
+    MODELS_OFFLINE,
+    EMBED_BACKEND,
+    WARMUP_MODELS,
+)
+from app.tracing import span
+
+# -------------------------------------------------
+# Shared Models
+#
+# Every module gets its models from here, so one process holds a single
+# copy of each and nothing is built at import time. Call warm_up() at
+# startup to pay loading and first-call costs before the first request.
+# -------------------------------------------------
+TEXT_EMBED_MODEL = "all-MiniLM-L6-v2"   # MUST MATCH between ingestion and retrieval
+IMAGE_EMBED_MODEL = "clip-ViT-B-32"
+OCR_LANGUAGES = ["en"]
+
+_models = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _sentence_transformer(name, backend="torch"):
+    from sentence_transformers import SentenceTransformer
+
+    kwargs = {"cache_folder": MODEL_CACHE_DIR}
+    if MODELS_OFFLINE:
+        kwargs["local_files_only"] = True
+    if backend != "torch":
+        # ONNX / OpenVINO export (sentence-transformers >= 3.2)
+        kwargs["backend"] = backend
+    return SentenceTransformer(name, **kwargs)
+
+
+def _load(key, factory):
+    # Fast path without locking once loaded
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    # One lock per model: loading EasyOCR must not block the text embedder
+    with _locks_guard:
+        lock = _locks.setdefault(key, threading.Lock())
+
+    with lock:
+        if key not in _models:
+            start = time.perf_counter()
+            with span("model_load", model=key):
+                _models[key] = factory()
+            print(f"📦 [MODELS] Loaded {key} in {time.perf_counter() - start:.1f}s")
+        return _models[key]
+
+
+def get_text_embedder():
+    return _load(TEXT_EMBED_MODEL, lambda: _sentence_transformer(TEXT_EMBED_MODEL, EMBED_BACKEND))
+
+
+def get_clip_model():
+    # CLIP stays on torch: the sentence-transformers ONNX backend only
+    # covers text transformer models
+    return _load(IMAGE_EMBED_MODEL, lambda: _sentence_transformer(IMAGE_EMBED_MODEL))
+
+
+def get_ocr_reader():
+    def factory():
+        import easyocr
+
+        # Set gpu=True if you have a GPU available
+        return easyocr.Reader(
+            OCR_LANGUAGES,
+            gpu=False,
+            model_storage_directory=MODEL_CACHE_DIR,
+            download_enabled=not MODELS_OFFLINE,
+        )
+
+    return _load("easyocr", factory)
+
+
+# -------------------------------------------------
+# Warm-up
+# -------------------------------------------------
+def _prime_text():
+    get_text_embedder().encode(["warm-up sentence for the embedding model"])
+
+
+def _prime_clip():
+    from PIL import Image
+
+    clip = get_clip_model()
+    clip.encode(["a diagram"], normalize_embeddings=True)
+    clip.encode([Image.new("RGB", (224, 224), "white")], normalize_embeddings=True)
+
+
+def _prime_ocr():
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (200, 60), "white")
+    ImageDraw.Draw(img).text((10, 20), "warm up", fill="black")
+    get_ocr_reader().readtext(np.array(img), detail=1)
+
+
+WARMUP_STEPS = {
+    "text": _prime_text,
+    "clip": _prime_clip,
+    "ocr": _prime_ocr,
+}
+
+
+def warm_up(models=WARMUP_MODELS):
+    """
+    Load the selected models ("text", "clip", "ocr") and run one dummy
+    inference each, so the first real request doesn't pay for weight
+    loading, allocator growth or kernel selection.
+
+    Returns seconds per model plus "total".
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    with span("warm_up"):
+        for name in models:
+            if name not in WARMUP_STEPS:
+                raise ValueError(f"Unknown model for warm-up: {name} (expected {', '.join(WARMUP_STEPS)})")
+            step_start = time.perf_counter()
+            WARMUP_STEPS[name]()
+            timings[name] = round(time.perf_counter() - step_start, 3)
+
+    timings["total"] = round(time.perf_counter() - start, 3)
+    print(f"🔥 [WARM-UP] {timings}")
+    return timings
@@ -1,18 +1,9 @@
 # app/qa/basic_rag.py
 
 from app.retrievers.text_retriever import retrieve_text
-from langchain_groq import ChatGroq
+from app.llm.provider import get_llm
 
-
-
-import os
-from dotenv import load_dotenv
-load_dotenv()
-
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    api_key=os.getenv("GROQ_API_KEY")
-)
+llm = get_llm()
 
 
 def answer_query(query):
@@ -1,23 +1,79 @@
 # app/retrievers/image_retriever.py
 
 import chromadb
-from sentence_transformers import SentenceTransformer
+from app.config import CHROMA_PATH
+from app.tracing import span
+from app.models import get_clip_model, IMAGE_EMBED_MODEL
 
-# Load same CLIP model
-clip_model = SentenceTransformer("clip-ViT-B-32")
+# Region embeddings are unit-normalized, so L2 distance d maps to cosine
+# similarity 1 - d / 2. CLIP text-image similarities are low in absolute
+# terms; regions further than this are treated as unrelated.
+REGION_MAX_DISTANCE = 1.5
 
-# Same collection
-client = chromadb.PersistentClient(path="chroma_db")
 
-collection = client.get_or_create_collection("image_docs")
+def _collection():
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+    return client.get_or_create_collection("image_docs")
+
+
+def _embed_query(query):
+    with span("query_embed", model=IMAGE_EMBED_MODEL, bytes=len(query)):
+        return get_clip_model().encode(query, normalize_embeddings=True).tolist()
+
 
 def retrieve_images(query, k=5):
     """Find relevant images for a text query."""
-    query_emb = clip_model.encode(query).tolist()
+    query_emb = _embed_query(query)
 
-    results = collection.query(
-        query_embeddings=[query_emb],
-        n_results=k
-    )
+    with span("vector_search", collection="image_docs", k=k) as s:
+        results = _collection().query(
+            query_embeddings=[query_emb],
+            n_results=k
+        )
+        s["chunks"] = len(results["ids"][0])
 
     return results
+
+
+def retrieve_image_regions(query, k=3, max_distance=REGION_MAX_DISTANCE):
+    """
+    Best-matching region per image for a text query.
+
+    Returns up to k dicts, closest first:
+    {"source", "path", "region", "box": (x0, y0, x1, y1), "ocr_text", "distance"}
+    """
+    collection = _collection()
+    if collection.count() == 0:
+        return []
+
+    query_emb = _embed_query(query)
+
+    # Several regions of one image can rank high; over-fetch, then keep
+    # only the best region of each image
+    with span("vector_search", collection="image_docs", k=k * 8) as s:
+        results = collection.query(
+            query_embeddings=[query_emb],
+            n_results=min(k * 8, collection.count()),
+            include=["documents", "metadatas", "distances"]
+        )
+        s["chunks"] = len(results["ids"][0])
+
+    best = {}
+    for doc, meta, dist in zip(
+        results["documents"][0], results["metadatas"][0], results["distances"][0]
+    ):
+        if dist > max_distance:
+            continue
+        source = meta.get("source", "unknown")
+        if source in best:
+            continue
+        best[source] = {
+            "source": source,
+            "path": meta.get("path"),
+            "region": meta.get("region", 0),
+            "box": (meta.get("x0"), meta.get("y0"), meta.get("x1"), meta.get("y1")),
+            "ocr_text": doc if meta.get("has_ocr") else "",
+            "distance": dist,
+        }
+
+    return list(best.values())[:k]
@@ -1,22 +1,37 @@
 # app/retrievers/text_retriever.py
 
 import chromadb
-from sentence_transformers import SentenceTransformer
 from app.config import CHROMA_PATH
+from app.tracing import span
+from app.models import get_text_embedder, TEXT_EMBED_MODEL
+
 
 # ---------------------------
-# Embedding Model (MUST MATCH INGESTION)
+# Query Embedding
 # ---------------------------
-EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
-embed_model = SentenceTransformer(EMBED_MODEL_NAME)
+def embed_query(query: str):
+    with span("query_embed", model=TEXT_EMBED_MODEL, bytes=len(query)):
+        return get_text_embedder().encode(query).tolist()
+
+
+def text_doc_count():
+    """
+    Chunks in text_docs. Changes whenever ingestion adds chunks or the
+    database is cleared, so callers can tell cached results are stale.
+    """
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+    return client.get_or_create_collection(name="text_docs").count()
 
 
 # ---------------------------
 # Text Retrieval
 # ---------------------------
-def retrieve_text(query: str, k: int = 5):
+def retrieve_text(query: str, k: int = 5, query_embedding=None, include_embeddings: bool = False):
     """
     Retrieve top-k text chunks from ChromaDB
+
+    Pass query_embedding to skip re-encoding a query that is already
+    embedded; include_embeddings also returns the chunk vectors.
     """
 
     if not query or not query.strip():
@@ -41,16 +56,20 @@ def retrieve_text(query: str, k: int = 5):
     # ---------------------------
     # Embed Query
     # ---------------------------
-    query_embedding = embed_model.encode(query).tolist()
+    if query_embedding is None:
+        query_embedding = embed_query(query)
 
     # ---------------------------
     # Query Chroma
     # ---------------------------
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=k,
-        include=["documents", "metadatas", "distances"]
-    )
+    with span("vector_search", collection="text_docs", k=k) as s:
+        results = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+                    + (["embeddings"] if include_embeddings else [])
+        )
+        s["chunks"] = len(results["documents"][0])
 
     print(f"✅ [TEXT RETRIEVER] Retrieved {len(results['documents'][0])} chunks")
 
@@ -0,0 +1,205 @@
+# app/tracing.py
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from app.config import TRACING_ENABLED, TRACE_PATH, METRICS_PATH, TRACE_PROCESS
+
+# -------------------------------------------------
+# Lightweight span tracing for the RAG pipeline
+#
+#   with span("vector_search", collection="text_docs") as s:
+#       results = collection.query(...)
+#       s["chunks"] = len(results["documents"][0])
+#
+# Finished traces are appended to TRACE_PATH (one JSON span per line)
+# and aggregated into Prometheus text metrics written to METRICS_PATH.
+# Metrics cover this process only; every series carries a process label
+# so the per-process files can be scraped side by side.
+# -------------------------------------------------
+
+# Histogram buckets (seconds) for span durations
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+_lock = threading.Lock()
+_pending = {}       # trace_id -> finished spans waiting for their root
+_durations = {}     # span name -> {"count", "sum", "buckets"}
+_attr_totals = {}   # (span name, attr) -> summed numeric value
+_cache = {}         # span name -> {"hit": n, "miss": n}
+
+
+# -------------------------------------------------
+# Spans
+# -------------------------------------------------
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a pipeline stage. Yields a dict: numeric values set on it
+    (tokens, chunks, bytes) are summed into metrics, and a boolean
+    "cache_hit" is counted as a cache hit or miss.
+    """
+    if not TRACING_ENABLED:
+        yield attrs
+        return
+
+    parent = _current_span.get()
+    record = {
+        "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start": time.time(),
+    }
+    token = _current_span.set(record)
+    start = time.perf_counter()
+    error = None
+
+    try:
+        yield attrs
+    except Exception as e:
+        error = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        record["attrs"] = attrs
+        if error:
+            record["error"] = error
+        _finish(record, is_root=parent is None)
+
+
+def _finish(record, is_root):
+    with _lock:
+        _record_metrics(record)
+        _pending.setdefault(record["trace_id"], []).append(record)
+        if not is_root:
+            return
+        spans = _pending.pop(record["trace_id"])
+
+    _write_trace(spans)
+    write_metrics()
+
+
+def _record_metrics(record):
+    name = record["name"]
+    seconds = record["duration_ms"] / 1000
+
+    hist = _durations.setdefault(
+        name, {"count": 0, "sum": 0.0, "buckets": [0] * len(DURATION_BUCKETS)}
+    )
+    hist["count"] += 1
+    hist["sum"] += seconds
+    for i, bound in enumerate(DURATION_BUCKETS):
+        if seconds <= bound:
+            hist["buckets"][i] += 1
+
+    for key, value in record["attrs"].items():
+        if key == "cache_hit":
+            counts = _cache.setdefault(name, {"hit": 0, "miss": 0})
+            counts["hit" if value else "miss"] += 1
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            _attr_totals[(name, key)] = _attr_totals.get((name, key), 0) + value
+
+
+# -------------------------------------------------
+# Export
+# -------------------------------------------------
+def _write_trace(spans):
+    if not TRACE_PATH:
+        return
+    try:
+        with open(TRACE_PATH, "a", encoding="utf-8") as f:
+            for record in sorted(spans, key=lambda r: r["start"]):
+                f.write(json.dumps(record, default=str) + "\n")
+    except OSError as e:
+        print(f"⚠️ [TRACING] Could not write trace: {e}")
+
+
+def prometheus_metrics() -> str:
+    """
+    Current metrics in the Prometheus text exposition format.
+    """
+    proc = f'process="{TRACE_PROCESS}",'
+    lines = [
+        "# HELP rag_span_duration_seconds Duration of RAG pipeline stages.",
+        "# TYPE rag_span_duration_seconds histogram",
+    ]
+
+    with _lock:
+        for name, hist in sorted(_durations.items()):
+            for bound, count in zip(DURATION_BUCKETS, hist["buckets"]):
+                lines.append(f'rag_span_duration_seconds_bucket{{{proc}span="{name}",le="{bound}"}} {count}')
+            lines.append(f'rag_span_duration_seconds_bucket{{{proc}span="{name}",le="+Inf"}} {hist["count"]}')
+            lines.append(f'rag_span_duration_seconds_sum{{{proc}span="{name}"}} {hist["sum"]:.6f}')
+            lines.append(f'rag_span_duration_seconds_count{{{proc}span="{name}"}} {hist["count"]}')
+
+        lines.append("# HELP rag_span_attr_total Summed sizes recorded on spans (tokens, chunks, bytes).")
+        lines.append("# TYPE rag_span_attr_total counter")
+        for (name, key), total in sorted(_attr_totals.items()):
+            lines.append(f'rag_span_attr_total{{{proc}span="{name}",attr="{key}"}} {total}')
+
+        lines.append("# HELP rag_cache_requests_total Cache lookups by result.")
+        lines.append("# TYPE rag_cache_requests_total counter")
+        for name, counts in sorted(_cache.items()):
+            for result, count in counts.items():
+                lines.append(f'rag_cache_requests_total{{{proc}span="{name}",result="{result}"}} {count}')
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str = METRICS_PATH):
+    """
+    Overwrite path with this process's metrics (node_exporter textfile
+    style). Written once per finished root span.
+    """
+    if not path:
+        return
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(prometheus_metrics())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ [TRACING] Could not write metrics: {e}")
+
+
+def span_summary() -> dict:
+    """
+    Per-stage call count and total seconds, for benchmark reports.
+    """
+    with _lock:
+        return {
+            name: {"count": hist["count"], "total_s": round(hist["sum"], 4)}
+            for name, hist in sorted(_durations.items())
+        }
+
+
+def reset_metrics():
+    with _lock:
+        _pending.clear()
+        _durations.clear()
+        _attr_totals.clear()
+        _cache.clear()
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+def llm_usage(response) -> dict:
+    """
+    Token counts from a chat model response, if the provider reports them.
+    """
+    metadata = getattr(response, "response_metadata", None) or {}
+    usage = metadata.get("token_usage") or {}
+    return {
+        key: usage[key]
+        for key in ("prompt_tokens", "completion_tokens")
+        if isinstance(usage.get(key), int)
+    }
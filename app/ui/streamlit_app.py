@@ -3,7 +3,7 @@ import os
 import sys
 import chromadb
 import time
-import json
+import shutil
 from PIL import Image
 
 # -------------------------------------------------
@@ -13,20 +13,52 @@ ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
-from app.config import UPLOAD_DIR, CHROMA_PATH
-from app.ingestion.pdf_ingest import ingest_pdf
-from app.ingestion.image_ingest import ingest_image
+from app.config import UPLOAD_DIR, CHROMA_PATH, UPLOAD_CHUNK_BYTES
+from app.ingestion.job_queue import (
+    submit_job,
+    list_jobs,
+    retry_failed_jobs,
+    clear_finished_jobs,
+    start_workers
+)
+from app.tracing import span
+from app.models import warm_up
 from app.agents.router_agent import route_query
 from app.agents.rag_agent import multimodal_rag, get_raw_context
+from app.agents.conversation import new_conversation
 from app.agents.automation_agent import (
     generate_email,
     generate_summary,
-    generate_bug_report
+    generate_bug_report_structured
 )
 
+# Must be the first Streamlit command (spinners included)
+st.set_page_config(page_title="Multi-Agent AI Hub", layout="wide")
+
 # Ensure directory exists for cloud storage
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+@st.cache_resource(show_spinner=False)
+def _ingest_workers():
+    """One set of background ingestion workers per server process, shared by all sessions."""
+    return start_workers()
+
+_ingest_workers()
+
+@st.cache_resource(show_spinner=False)
+def _warm_models():
+    """Load and prime models once per server process, before the first query."""
+    return warm_up()
+
+with st.spinner("Loading models..."):
+    warmup_timings = _warm_models()
+
+def save_upload(uploaded_file, path):
+    """Copy an upload to disk in fixed-size chunks instead of one full-buffer write."""
+    uploaded_file.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(uploaded_file, f, UPLOAD_CHUNK_BYTES)
+
 def get_relative_path(absolute_path):
     """Fixes 'MediaFileStorageError' by converting paths for Linux servers."""
     try:
@@ -40,8 +72,6 @@ def get_relative_path(absolute_path):
 # -------------------------------------------------
 # 2. UI STYLING (Professional Dark Mode)
 # -------------------------------------------------
-st.set_page_config(page_title="Multi-Agent AI Hub", layout="wide")
-
 st.markdown("""
     <style>
     .stApp { background-color: #000000; color: #FFFFFF; }
@@ -102,21 +132,37 @@ with st.sidebar:
         if not up_pdfs and not up_imgs:
             st.warning("Please upload files first.")
         else:
-            with st.status("🏗️ Agent Ingestion in Progress...", expanded=True) as status:
-                if up_pdfs:
-                    for pdf in up_pdfs:
-                        path = os.path.join(UPLOAD_DIR, pdf.name)
-                        with open(path, "wb") as f: f.write(pdf.getbuffer())
-                        ingest_pdf(path)
-                        st.write(f"✅ Indexed Text: {pdf.name}")
-                if up_imgs:
-                    for img in up_imgs:
-                        path = os.path.join(UPLOAD_DIR, img.name)
-                        with open(path, "wb") as f: f.write(img.getbuffer())
-                        ingest_image(path)
-                        st.write(f"✅ Indexed Visuals: {img.name}")
-                status.update(label="Ingestion Complete!", state="complete")
-            st.rerun()
+            # Jobs run in background workers, so a refresh does not lose progress
+            for up in (up_pdfs or []) + (up_imgs or []):
+                path = os.path.join(UPLOAD_DIR, up.name)
+                save_upload(up, path)
+                submit_job(path)
+            st.success("Files queued for ingestion.")
+
+    @st.fragment(run_every=2)
+    def ingestion_status():
+        jobs = list_jobs(limit=20)
+        if not jobs:
+            return
+        st.markdown("#### 🏗️ Ingestion Jobs")
+        for job in jobs:
+            name = os.path.basename(job["path"])
+            if job["status"] == "running":
+                pct = job["progress"] / job["total"] if job["total"] else 0.0
+                st.progress(pct, text=f"⏳ {name} ({job['progress']}/{job['total']})")
+            elif job["status"] == "queued":
+                st.caption(f"🕒 Queued: {name}")
+            elif job["status"] == "done":
+                st.caption(f"✅ Indexed: {name}")
+            else:
+                st.caption(f"❌ Failed: {name} — {job['error']}")
+        b1, b2 = st.columns(2)
+        if b1.button("Retry Failed", use_container_width=True):
+            retry_failed_jobs()
+        if b2.button("Clear Done", use_container_width=True):
+            clear_finished_jobs()
+
+    ingestion_status()
 
     st.divider()
     st.markdown("### 🧹 Database Cleanup")
@@ -127,6 +173,7 @@ with st.sidebar:
             except: pass
         st.session_state.last_rag_response = None
         st.session_state.last_query = ""
+        st.session_state.conversation = new_conversation()
         st.success("Brain reset complete.")
         time.sleep(1)
         st.rerun()
@@ -138,14 +185,17 @@ if "last_rag_response" not in st.session_state:
     st.session_state.last_rag_response = None
 if "last_query" not in st.session_state:
     st.session_state.last_query = ""
+if "conversation" not in st.session_state:
+    st.session_state.conversation = new_conversation()
 
 query = st.chat_input("Ask about your documents...")
 
 if query:
-    with st.spinner("🤖 Consulting Specialist Agents..."):
+    with st.spinner("🤖 Consulting Specialist Agents..."), span("chat_turn"):
         st.session_state.last_route = route_query(query)
-        st.session_state.last_rag_response = multimodal_rag(query)
-        st.session_state.last_query = query
+        st.session_state.last_rag_response = multimodal_rag(query, st.session_state.conversation)
+        # Automation tools retrieve with the standalone (rewritten) query
+        st.session_state.last_query = st.session_state.last_rag_response["standalone_query"]
 
 if st.session_state.last_rag_response:
     res = st.session_state.last_rag_response
@@ -154,6 +204,18 @@ if st.session_state.last_rag_response:
     route = st.session_state.get('last_route', 'GENERAL')
     st.markdown(f"**Agent Routed to:** `:blue[{route.upper()}]`")
     
+    # Earlier turns (the latest one is rendered below)
+    for turn in st.session_state.conversation["turns"][:-1]:
+        with st.chat_message("user"):
+            st.markdown(turn["query"])
+        with st.chat_message("assistant"):
+            st.markdown(turn["answer"])
+
+    latest = st.session_state.conversation["turns"][-1:]
+    if latest:
+        with st.chat_message("user"):
+            st.markdown(latest[0]["query"])
+
     with st.chat_message("assistant"):
         st.markdown(res.get("answer", "No answer found."))
 
@@ -170,8 +232,21 @@ if st.session_state.last_rag_response:
             st.write("No direct text evidence found.")
     
     with st.expander("🖼 View Image Evidence", expanded=False):
+        regions = res.get("image_regions", [])
         image_paths = res.get("images", [])
-        if image_paths:
+        if regions:
+            img_cols = st.columns(len(regions))
+            for i, region in enumerate(regions):
+                try:
+                    with Image.open(region["path"]) as img_file:
+                        crop = img_file.crop(region["box"]) if region["region"] else img_file.copy()
+                    crop.thumbnail((1024, 1024))
+                    img_cols[i].image(crop, use_container_width=True, caption=f"Source: {region['source']}")
+                    if region["ocr_text"]:
+                        img_cols[i].caption(f"📌 {region['ocr_text'][:300]}")
+                except:
+                    img_cols[i].error(f"Missing File: {region['source']}")
+        elif image_paths:
             img_cols = st.columns(len(image_paths))
             for i, p in enumerate(image_paths):
                 rel_p = get_relative_path(p)
@@ -205,15 +280,17 @@ if st.session_state.last_rag_response:
     with c3:
         if st.button("🐞 Bug Report", use_container_width=True):
             st.markdown("#### Technical JSON Report")
-            bug_output = generate_bug_report(raw_ctx, "Format as valid JSON.")
-            
-            clean_json = bug_output.replace("```json", "").replace("```", "").strip()
-            try:
-                bug_data = json.loads(clean_json)
-                st.json(bug_data)
-            except:
-                st.warning("AI output was not perfectly formatted JSON. Raw text below:")
-                st.code(bug_output)
+            bug_output = generate_bug_report_structured(raw_ctx, "Format as valid JSON.")
+
+            if bug_output["report"]:
+                st.json(bug_output["report"])
+                if bug_output["repaired"]:
+                    st.caption("🔧 Output was repaired to match the report schema.")
+                elif bug_output["regenerated"]:
+                    st.caption("🔁 First answer was not JSON; the report was regenerated.")
+            else:
+                st.warning("AI output did not match the report schema: " + "; ".join(bug_output["errors"]))
+                st.code(bug_output["raw"])
 
 # -------------------------------------------------
 # Debugging
@@ -221,3 +298,4 @@ if st.session_state.last_rag_response:
 with st.expander("🛠 System Debug"):
     st.write("Root Directory:", ROOT_DIR)
     st.write("Chroma Path:", CHROMA_PATH)
+    st.write("Model warm-up (s):", warmup_timings)
@@ -0,0 +1,124 @@
+# benchmarks/corpus.py
+
+import os
+import random
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageDraw, ImageFont
+
+# -------------------------------------------------
+# Synthetic corpus with labeled facts
+#
+# Every PDF page and every image carries one unique fact. Each fact
+# comes with a query and the source (and page) that should answer it,
+# so retrieval recall can be measured without any hand-labeled data.
+# -------------------------------------------------
+
+FILLER_WORDS = (
+    "system pipeline latency throughput vector index retrieval document "
+    "network service request cache storage model embedding query cluster "
+    "deployment monitoring incident report quarterly review budget policy "
+    "customer release schedule capacity region backup migration analysis"
+).split()
+
+CITIES = ["Oslo", "Lima", "Perth", "Accra", "Quito", "Hanoi", "Tunis", "Riga", "Dakar", "Sofia"]
+COLORS = ["amber", "cobalt", "crimson", "jade", "violet", "ochre", "teal", "scarlet"]
+
+
+def _filler(rng, n_words):
+    return " ".join(rng.choice(FILLER_WORDS) for _ in range(n_words))
+
+
+def _fact(rng, idx):
+    code = f"FX{idx:04d}"
+    city = rng.choice(CITIES)
+    turbines = rng.randint(10, 999)
+    text = f"Facility {code} is located in {city} and operates {turbines} turbines."
+    query = f"Where is facility {code} located and how many turbines does it operate?"
+    return text, query
+
+
+def generate_pdfs(out_dir, num_pdfs=2, pages_per_pdf=10, words_per_page=350, seed=0):
+    """
+    Write synthetic PDFs and return (paths, labels).
+    labels: [{"query", "source", "page"}]
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    paths, labels = [], []
+    fact_idx = 0
+
+    for pdf_idx in range(num_pdfs):
+        file_name = f"bench_doc_{pdf_idx:03d}.pdf"
+        path = os.path.join(out_dir, file_name)
+
+        doc = fitz.open()
+        for page_idx in range(pages_per_pdf):
+            fact, query = _fact(rng, fact_idx)
+            fact_idx += 1
+
+            # Put the fact in the middle of the page's filler text
+            half = words_per_page // 2
+            text = f"{_filler(rng, half)}. {fact} {_filler(rng, half)}."
+
+            page = doc.new_page()
+            page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=8)
+
+            labels.append({"query": query, "source": file_name, "page": page_idx + 1})
+
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+
+    return paths, labels
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 has no sized default font
+        return ImageFont.load_default()
+
+
+def generate_images(out_dir, num_images=3, size=(1200, 800), seed=0):
+    """
+    Write synthetic screenshots with rendered text and return (paths, labels).
+    labels: [{"query", "source"}]
+    """
+    rng = random.Random(seed + 1)
+    os.makedirs(out_dir, exist_ok=True)
+    font = _font(28)
+
+    paths, labels = [], []
+
+    for img_idx in range(num_images):
+        file_name = f"bench_img_{img_idx:03d}.png"
+        path = os.path.join(out_dir, file_name)
+
+        color = rng.choice(COLORS)
+        code = f"ERR-{rng.randint(1000, 9999)}"
+        lines = [
+            f"Dashboard alert {code}",
+            f"The {color} login service returned error {code}",
+            f"after {rng.randint(2, 60)} seconds of retries.",
+            _filler(rng, 6),
+            _filler(rng, 6),
+        ]
+
+        img = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(img)
+        y = 40
+        for line in lines:
+            draw.text((40, y), line, fill="black", font=font)
+            y += 60
+        img.save(path)
+
+        paths.append(path)
+        labels.append({
+            "query": f"Which login service returned error {code}?",
+            "source": file_name,
+        })
+
+    return paths, labels
@@ -0,0 +1,76 @@
+# run_batch_automation.py
+#
+# Generate emails / summaries / bug reports for many queries at once.
+#
+#   python run_batch_automation.py jobs.jsonl --out results.jsonl --workers 8
+#
+# Each input line is a JSON object:
+#   {"id": "wk-42", "query": "Outages in the payments service", "workflow": "summary"}
+# "workflow" is one of email | summary | bug_report (default: --workflow),
+# "request" optionally overrides the instruction text. Lines that use
+# request_id/title/body (e.g. a requests.jsonl backlog) are accepted too.
+# Results are written one line per job as soon as each job finishes.
+
+import argparse
+import json
+import sys
+import time
+
+from app.agents.batch_automation import run_batch, WORKFLOWS
+from app.config import LLM_MAX_CONCURRENCY
+
+
+def load_jobs(path, default_workflow):
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            raw = json.loads(line)
+            query = raw.get("query") or raw.get("title")
+            if not query:
+                raise ValueError(f"{path}:{line_no}: missing 'query'")
+            jobs.append({
+                "id": raw.get("id") or raw.get("request_id") or line_no,
+                "query": query,
+                "workflow": raw.get("workflow", default_workflow),
+                "request": raw.get("request") or raw.get("body"),
+            })
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch automation runner")
+    parser.add_argument("jobs", help="JSONL file of jobs")
+    parser.add_argument("--out", default="batch_results.jsonl", help="JSONL output file")
+    parser.add_argument("--workflow", default="summary", choices=sorted(WORKFLOWS))
+    parser.add_argument("--workers", type=int, default=LLM_MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.jobs, args.workflow)
+    out = open(args.out, "w", encoding="utf-8")
+
+    start = time.perf_counter()
+    failed = 0
+    results = run_batch(jobs, max_workers=args.workers)
+    try:
+        for done, result in enumerate(results, 1):
+            failed += bool(result["error"])
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            print(f"[{done}/{len(jobs)}] {result['id']} {result['workflow']} "
+                  f"{'❌ ' + result['error'] if result['error'] else '✅'}")
+    except KeyboardInterrupt:
+        print(f"⏹️ Interrupted; jobs not started yet were cancelled (results so far in {args.out})")
+        return 130
+    finally:
+        # Cancels queued jobs right away instead of at garbage collection
+        results.close()
+        out.close()
+
+    print(f"🏁 {len(jobs)} jobs in {time.perf_counter() - start:.1f}s, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+# run_benchmarks.py
+#
+# Offline benchmark for the ingestion and query paths.
+#
+#   python run_benchmarks.py --pdfs 4 --pages 25 --images 5 --out bench.json
+#   python run_benchmarks.py --out new.json --compare bench.json
+#
+# Uses a synthetic corpus, a throwaway ChromaDB directory and a stub LLM,
+# so no network is needed (models must already be in MODEL_CACHE_DIR,
+# see run_warmup.py --download).
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# -------------------------------------------------
+# Isolated, offline environment (before any app import)
+# -------------------------------------------------
+WORK_DIR = tempfile.mkdtemp(prefix="rag_bench_")
+os.environ["CHROMA_PATH"] = os.path.join(WORK_DIR, "chroma_db")
+os.environ["JOBS_DB_PATH"] = os.path.join(WORK_DIR, "ingest_jobs.db")
+os.environ["TRACE_DIR"] = os.path.join(WORK_DIR, "traces")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("MODELS_OFFLINE", "1")
+os.environ["LLM_PROVIDER"] = "stub"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def latency_stats(seconds):
+    ms = [s * 1000 for s in seconds]
+    return {
+        "n": len(ms),
+        "p50_ms": round(percentile(ms, 50), 2) if ms else None,
+        "p95_ms": round(percentile(ms, 95), 2) if ms else None,
+        "p99_ms": round(percentile(ms, 99), 2) if ms else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def quiet(verbose):
+    """Silence the pipeline's progress prints unless --verbose."""
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def is_hit(metadatas, label):
+    for meta in metadatas:
+        if meta.get("source") != label["source"]:
+            continue
+        if "page" not in label or meta.get("page") == label["page"]:
+            return True
+    return False
+
+
+# -------------------------------------------------
+# Comparison
+# -------------------------------------------------
+def flatten(report, prefix=""):
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    old, new = flatten(baseline), flatten(current)
+    print(f"\n📊 Compared to {baseline_path} ({baseline.get('meta', {}).get('commit')})")
+    for key in sorted(new):
+        if key not in old or key.startswith("config."):
+            continue
+        before, after = old[key], new[key]
+        delta = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"  {key:<45} {before:>12} -> {after:<12} {delta}")
+
+
+# -------------------------------------------------
+# Benchmark
+# -------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Offline RAG benchmark")
+    parser.add_argument("--pdfs", type=int, default=2)
+    parser.add_argument("--pages", type=int, default=10, help="pages per PDF")
+    parser.add_argument("--images", type=int, default=3)
+    parser.add_argument("--k", type=int, default=5, help="top-k for recall")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the query set")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stub LLM delay (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_output.json")
+    parser.add_argument("--compare", help="baseline JSON to diff against")
+    parser.add_argument("--keep", action="store_true", help="keep the temp corpus/DB")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["LLM_STUB_LATENCY"] = str(args.llm_latency)
+
+    from benchmarks.corpus import generate_pdfs, generate_images
+
+    corpus_dir = os.path.join(WORK_DIR, "corpus")
+    pdf_paths, pdf_labels = generate_pdfs(corpus_dir, args.pdfs, args.pages, seed=args.seed)
+    img_paths, img_labels = generate_images(corpus_dir, args.images, seed=args.seed)
+    print(f"🧪 Corpus: {len(pdf_paths)} PDFs x {args.pages} pages, {len(img_paths)} images in {WORK_DIR}")
+
+    t0 = time.perf_counter()
+    with quiet(args.verbose):
+        from app.ingestion.pdf_ingest import ingest_pdf
+        from app.ingestion.image_ingest import ingest_image
+        from app.retrievers.text_retriever import retrieve_text
+        from app.retrievers.image_retriever import retrieve_image_regions
+        from app.agents.rag_agent import multimodal_rag
+        from app.ingestion.memory_guard import peak_rss_mb
+        from app.tracing import span_summary
+        from app.models import warm_up
+    import_s = time.perf_counter() - t0
+
+    # Models load lazily; warm them up front so load time isn't billed
+    # to the first ingested file or query
+    with quiet(args.verbose):
+        warmup = warm_up()
+
+    import chromadb
+    from app.config import CHROMA_PATH
+
+    def text_count():
+        client = chromadb.PersistentClient(path=CHROMA_PATH)
+        return client.get_or_create_collection("text_docs").count()
+
+    # ---------------------
+    # Ingestion
+    # ---------------------
+    t0 = time.perf_counter()
+    with quiet(args.verbose):
+        for path in pdf_paths:
+            ingest_pdf(path)
+    pdf_s = time.perf_counter() - t0
+    pdf_chunks = text_count()
+
+    t0 = time.perf_counter()
+    with quiet(args.verbose):
+        for path in img_paths:
+            ingest_image(path)
+    img_s = time.perf_counter() - t0
+
+    total_pages = len(pdf_labels)
+    ingest = {
+        "pdf_seconds": round(pdf_s, 3),
+        "pages_per_s": round(total_pages / pdf_s, 2) if pdf_s else None,
+        "chunks_per_s": round(pdf_chunks / pdf_s, 2) if pdf_s else None,
+        "image_seconds": round(img_s, 3),
+        "images_per_s": round(len(img_paths) / img_s, 2) if img_s else None,
+        "text_chunks_total": text_count(),
+    }
+
+    # ---------------------
+    # Queries
+    # ---------------------
+    labels = pdf_labels + img_labels
+    retrieve_s, rag_s = [], []
+    hits = {"pdf": 0, "image": 0}
+    region_hits = 0
+
+    with quiet(args.verbose):
+        for rep in range(args.repeat):
+            for label in labels:
+                t0 = time.perf_counter()
+                results = retrieve_text(label["query"], k=args.k)
+                retrieve_s.append(time.perf_counter() - t0)
+
+                if rep == 0 and is_hit(results["metadatas"][0], label):
+                    hits["pdf" if "page" in label else "image"] += 1
+
+                if rep == 0 and "page" not in label:
+                    regions = retrieve_image_regions(label["query"], k=args.k)
+                    region_hits += is_hit(regions, label)
+
+                t0 = time.perf_counter()
+                multimodal_rag(label["query"])
+                rag_s.append(time.perf_counter() - t0)
+
+    recall = {
+        f"pdf_at_{args.k}": round(hits["pdf"] / len(pdf_labels), 4) if pdf_labels else None,
+        f"image_at_{args.k}": round(hits["image"] / len(img_labels), 4) if img_labels else None,
+        f"overall_at_{args.k}": round(sum(hits.values()) / len(labels), 4) if labels else None,
+        f"image_region_at_{args.k}": round(region_hits / len(img_labels), 4) if img_labels else None,
+    }
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "config": {
+            "pdfs": args.pdfs,
+            "pages_per_pdf": args.pages,
+            "images": args.images,
+            "k": args.k,
+            "repeat": args.repeat,
+            "llm_latency_s": args.llm_latency,
+            "seed": args.seed,
+        },
+        "import_s": round(import_s, 3),
+        "warmup_s": warmup,
+        "ingest": ingest,
+        "query": {
+            "retrieve": latency_stats(retrieve_s),
+            "rag_end_to_end": latency_stats(rag_s),
+        },
+        "recall": recall,
+        "memory": {"peak_rss_mb": round(peak_rss_mb(), 1)},
+        "stages": span_summary(),
+    }
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps({k: report[k] for k in ("warmup_s", "ingest", "query", "recall", "memory")}, indent=2))
+    print(f"💾 Report written to {args.out}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+    if not args.keep:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# run_ingest_worker.py
+#
+# Standalone ingestion worker, independent of any browser session.
+#
+#   python run_ingest_worker.py                 # process queued jobs forever
+#   python run_ingest_worker.py a.pdf b.png     # queue files, then process
+#   python run_ingest_worker.py --status        # print the job table
+
+import sys
+import time
+
+from app.config import INGEST_WORKERS
+from app.ingestion.job_queue import submit_job, list_jobs, start_workers
+from app.models import warm_up
+
+args = sys.argv[1:]
+
+if args == ["--status"]:
+    for job in list_jobs():
+        print(f"{job['id']:>5}  {job['status']:<8} {job['progress']}/{job['total']}  {job['path']}")
+    sys.exit(0)
+
+for path in args:
+    print(f"Queued job {submit_job(path)}: {path}")
+
+# Load models before claiming jobs so the first file isn't slowed down
+warm_up()
+
+# Jobs of a crashed process are requeued; jobs a live UI process is
+# running are left to it
+stop_event = start_workers(INGEST_WORKERS)
+
+try:
+    while True:
+        time.sleep(1)
+except KeyboardInterrupt:
+    stop_event.set()
+    print("Stopping workers; unfinished jobs resume on next start.")
@@ -0,0 +1,54 @@
+# run_snapshot.py
+#
+# Export the vector index once on the ingest box, import it on query nodes.
+#
+#   python run_snapshot.py export snapshots/2025-12-01 --dtype float16
+#   python run_snapshot.py import snapshots/2025-12-01 --replace
+#
+# Both sides stream in SNAPSHOT_BATCH_SIZE batches and use CHROMA_PATH.
+
+import argparse
+import sys
+
+from app.ingestion.snapshot import (
+    export_snapshot,
+    import_snapshot,
+    COLLECTION_MODELS,
+    DTYPES,
+    SnapshotError
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="write the local index to a snapshot directory")
+    exp.add_argument("path")
+    exp.add_argument("--dtype", choices=list(DTYPES), default="float32",
+                     help="float16 halves the snapshot size")
+    exp.add_argument("--collections", default=",".join(COLLECTION_MODELS))
+
+    imp = sub.add_parser("import", help="load a snapshot into the local index")
+    imp.add_argument("path")
+    imp.add_argument("--collections", help="default: every collection in the snapshot")
+    imp.add_argument("--replace", action="store_true",
+                     help="swap in the snapshot instead of merging (after a full load)")
+    imp.add_argument("--no-verify", action="store_true", help="skip checksum verification")
+
+    args = parser.parse_args()
+    collections = args.collections.split(",") if args.collections else None
+
+    try:
+        if args.command == "export":
+            export_snapshot(args.path, collections, dtype=args.dtype)
+        else:
+            import_snapshot(args.path, collections, replace=args.replace, verify=not args.no_verify)
+    except SnapshotError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
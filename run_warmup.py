@@ -0,0 +1,41 @@
+# run_warmup.py
+#
+# Load and prime models, printing how long each one takes.
+#
+#   python run_warmup.py                  # warm up WARMUP_MODELS from the cache
+#   python run_warmup.py --download       # fill MODEL_CACHE_DIR (build step)
+#   python run_warmup.py --models text    # warm up only some models
+#
+# Run --download once when building the image, then set MODELS_OFFLINE=1
+# on the serving pods so startup never goes to the network.
+
+import argparse
+import json
+import os
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--download", action="store_true",
+                        help="allow downloading missing models into MODEL_CACHE_DIR")
+    parser.add_argument("--models", help="comma-separated subset of text,clip,ocr")
+    args = parser.parse_args()
+
+    # Config is read at import time
+    if args.download:
+        os.environ["MODELS_OFFLINE"] = "0"
+
+    from app.config import MODEL_CACHE_DIR, WARMUP_MODELS
+    from app.models import warm_up
+
+    models = args.models.split(",") if args.models else WARMUP_MODELS
+    timings = warm_up(models)
+
+    print(f"Model cache: {MODEL_CACHE_DIR}")
+    print(json.dumps(timings, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# tests/test_bug_report.py
+
+import json
+import os
+
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+from app.agents import automation_agent
+
+REPORT = {
+    "title": "Login fails",
+    "description": "Users get a 500 after submitting the form.",
+    "impact": "No one can sign in.",
+    "steps_to_reproduce": ["Open /login", "Submit valid credentials"],
+    "priority": "High",
+}
+
+PROSE = "Sure! Based on the context, the login service crashes when the password is long. " * 5
+
+
+class ScriptedLLM:
+    """Returns queued answers and records every prompt it was given."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.prompts = []
+
+    class _Response:
+        def __init__(self, content):
+            self.content = content
+
+    def invoke(self, prompt, **params):
+        self.prompts.append(prompt)
+        return self._Response(self.answers.pop(0))
+
+    def stream(self, prompt, **params):
+        self.prompts.append(prompt)
+        answer = self.answers.pop(0)
+        for start in range(0, len(answer), 16):
+            yield answer[start:start + 16]
+
+
+def run(monkeypatch, answers, **kwargs):
+    llm = ScriptedLLM(answers)
+    monkeypatch.setattr(automation_agent, "llm", llm)
+    result = automation_agent.generate_bug_report_structured("CONTEXT-MARKER", "Format as JSON.", **kwargs)
+    return result, llm.prompts
+
+
+def test_valid_answer_needs_no_fix(monkeypatch):
+    result, prompts = run(monkeypatch, ["```json\n" + json.dumps(REPORT) + "\n```"])
+
+    assert result["report"] == REPORT
+    assert not result["repaired"] and not result["regenerated"]
+    assert len(prompts) == 1
+
+
+def test_prose_answer_is_regenerated_with_context(monkeypatch):
+    result, prompts = run(monkeypatch, [PROSE, json.dumps(REPORT)])
+
+    assert result["report"] == REPORT
+    assert result["regenerated"] and not result["repaired"]
+    # The retry sees the retrieval context, not just a prose fragment
+    assert "CONTEXT-MARKER" in prompts[1]
+    assert automation_agent.BUG_REPORT_STRICT_SUFFIX in prompts[1]
+
+
+def test_schema_errors_get_context_free_repair(monkeypatch):
+    broken = dict(REPORT)
+    del broken["impact"]
+    result, prompts = run(monkeypatch, [json.dumps(broken), json.dumps(REPORT)])
+
+    assert result["report"] == REPORT
+    assert result["repaired"] and not result["regenerated"]
+    assert "CONTEXT-MARKER" not in prompts[1]
+    assert "missing field 'impact'" in prompts[1]
+
+
+def test_unfixable_answer_reports_errors(monkeypatch):
+    result, prompts = run(monkeypatch, [PROSE, PROSE])
+
+    assert result["report"] is None
+    assert result["errors"] == ["output is not a JSON object"]
+    assert result["raw"] == PROSE
+    assert len(prompts) == 2
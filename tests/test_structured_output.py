@@ -0,0 +1,128 @@
+# tests/test_structured_output.py
+
+import json
+
+from app.agents.structured_output import (
+    IncrementalJSONObject,
+    MAX_OUTPUT_CHARS,
+    validate_bug_report
+)
+
+REPORT = {
+    "title": "Login fails",
+    "description": "Users get a 500 after submitting the form.",
+    "impact": "No one can sign in.",
+    "steps_to_reproduce": ["Open /login", "Submit valid credentials"],
+    "priority": "High",
+}
+
+
+def feed_all(parser, text, step=7):
+    """Feed text in small deltas like a stream; returns the index it stopped at."""
+    for start in range(0, len(text), step):
+        if parser.feed(text[start:start + step]):
+            return start + step
+    return len(text)
+
+
+# -------------------------------------------------
+# IncrementalJSONObject
+# -------------------------------------------------
+def test_stops_when_object_closes():
+    text = "```json\n" + json.dumps(REPORT) + "\n```\nHope this helps! " * 20
+    parser = IncrementalJSONObject()
+
+    stopped_at = feed_all(parser, text)
+
+    assert parser.complete
+    assert stopped_at < len(text)
+    assert parser.parse() == (REPORT, None)
+
+
+def test_braces_inside_strings_do_not_close_object():
+    data = {"title": 'Crash on "}" and \\"{', "steps_to_reproduce": ["a]b"]}
+    parser = IncrementalJSONObject()
+
+    feed_all(parser, json.dumps(data) + " trailing")
+
+    assert parser.parse() == (data, None)
+
+
+def test_prose_is_read_in_full_and_flagged():
+    prose = "Sure! Based on the context, the login service crashes. " * 10
+    parser = IncrementalJSONObject()
+
+    assert feed_all(parser, prose) == len(prose)
+    assert parser.not_json
+    assert parser.text == prose
+
+    data, error = parser.parse()
+    assert data is None
+    assert error == "output is not a JSON object"
+
+
+def test_json_after_long_preamble_is_kept():
+    parser = IncrementalJSONObject()
+
+    feed_all(parser, "Let me think about this carefully. " * 20 + json.dumps(REPORT))
+
+    assert not parser.not_json
+    assert parser.parse() == (REPORT, None)
+
+
+def test_short_preamble_is_skipped():
+    parser = IncrementalJSONObject()
+
+    feed_all(parser, "Here is the report:\n" + json.dumps(REPORT))
+
+    assert parser.parse() == (REPORT, None)
+
+
+def test_unclosed_object():
+    parser = IncrementalJSONObject()
+
+    assert parser.feed('{"title": "cut off') is False
+    assert parser.parse() == (None, "output ended before the JSON object was closed")
+
+
+def test_output_limit():
+    parser = IncrementalJSONObject()
+
+    assert parser.feed('{"description": "' + "x" * MAX_OUTPUT_CHARS) is True
+    assert parser.parse()[1] == f"output exceeded {MAX_OUTPUT_CHARS} characters"
+
+
+def test_invalid_json_reported():
+    parser = IncrementalJSONObject()
+
+    feed_all(parser, "{'title': 'single quotes'}")
+
+    data, error = parser.parse()
+    assert data is None
+    assert error.startswith("invalid JSON")
+
+
+# -------------------------------------------------
+# validate_bug_report
+# -------------------------------------------------
+def test_valid_report():
+    assert validate_bug_report(REPORT) == (REPORT, [])
+
+
+def test_steps_string_is_split():
+    report, errors = validate_bug_report(dict(REPORT, steps_to_reproduce="Open /login\nSubmit\n"))
+
+    assert errors == []
+    assert report["steps_to_reproduce"] == ["Open /login", "Submit"]
+
+
+def test_missing_and_wrong_typed_fields():
+    report, errors = validate_bug_report({"title": "x", "priority": 3})
+
+    assert report is None
+    assert "missing field 'description'" in errors
+    assert "'priority' must be a string" in errors
+
+
+def test_non_object():
+    assert validate_bug_report(["a"]) == (None, ["top-level value must be a JSON object"])